@@ -0,0 +1,91 @@
+from functools import partial
+from time import perf_counter
+
+import numpy as np
+from bitarray import bitarray
+
+from pig.entropy import (
+    CabacDecoder,
+    CabacEncoder,
+    FrequentistPM,
+    RangeDecoder,
+    RangeEncoder,
+    RansDecoder,
+    RansEncoder,
+    StateMachinePM,
+)
+
+
+def random_bits(size: int, probability_of_ones: float = 0.2, seed: int = 0) -> bitarray:
+    generator = np.random.default_rng(seed)
+    return bitarray((generator.random(size) < probability_of_ones).tolist())
+
+
+def bits_per_second(function, number_of_bits: int, repeat: int = 5) -> float:
+    best_time = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best_time = min(best_time, perf_counter() - start)
+    return number_of_bits / best_time
+
+
+def benchmark_coder(
+    encoder_type: type,
+    decoder_type: type,
+    model_type: type,
+    bits: bitarray,
+) -> tuple[float, float, int]:
+    encoded = encoder_type().encode(bits, model=model_type())
+    decoded = decoder_type().decode(encoded, len(bits), model=model_type())
+    assert decoded == bits
+
+    encode_speed = bits_per_second(
+        lambda: encoder_type().encode(bits, model=model_type()),
+        len(bits),
+    )
+    decode_speed = bits_per_second(
+        lambda: decoder_type().decode(encoded, len(bits), model=model_type()),
+        len(bits),
+    )
+    return encode_speed, decode_speed, len(encoded)
+
+
+def print_result(name: str, encode_speed: float, decode_speed: float, size: int):
+    print(
+        f"{name:<24}"
+        f"{encode_speed / 1e3:>12.1f} kbit/s"
+        f"{decode_speed / 1e3:>12.1f} kbit/s"
+        f"{size:>12} bits"
+    )
+
+
+if __name__ == "__main__":
+    bits = random_bits(200_000)
+
+    print(f"{'':<24}{'encode':>19}{'decode':>19}{'size':>17}")
+    print_result(
+        "CABAC float",
+        *benchmark_coder(CabacEncoder, CabacDecoder, FrequentistPM, bits),
+    )
+    print_result(
+        "CABAC integer table",
+        *benchmark_coder(CabacEncoder, CabacDecoder, StateMachinePM, bits),
+    )
+    print_result(
+        "Range coder float",
+        *benchmark_coder(RangeEncoder, RangeDecoder, FrequentistPM, bits),
+    )
+    print_result(
+        "Range coder integer",
+        *benchmark_coder(RangeEncoder, RangeDecoder, StateMachinePM, bits),
+    )
+    print_result(
+        "rANS x4 float",
+        *benchmark_coder(
+            partial(RansEncoder, streams=4),
+            partial(RansDecoder, streams=4),
+            FrequentistPM,
+            bits,
+        ),
+    )
@@ -1,5 +1,7 @@
+from .blocked_lightfield import BlockedLightField
 from .blocked_mico import BlockedMico
 from .blocked_mule import BlockedMule
+from .predictive_lightfield import PredictiveLightField
 from .whole_image_mico import WholeImageMico
 from .whole_image_mule import WholeImageMule
 
@@ -8,4 +10,6 @@ __all__ = [
     "WholeImageMule",
     "WholeImageMico",
     "BlockedMico",
+    "BlockedLightField",
+    "PredictiveLightField",
 ]
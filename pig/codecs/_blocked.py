@@ -0,0 +1,416 @@
+from math import ceil
+from typing import BinaryIO, Callable
+
+import numpy as np
+from bitarray import bitarray
+
+from pig.metrics.rate_distortion import RD
+from pig.utils.bit_stream import BitReader, BitWriter
+from pig.utils.block_transform import block_dctn, block_idctn
+from pig.utils.block_utils import block_shapes_equal_size
+
+from ._parallel import BlockPool, block_pool
+from ._skip import find_skipped_blocks, map_unskipped, skip_block, zero_block
+from ._streaming import read_sizes_trailer, tile_rows, write_sizes_trailer
+
+
+class BlockedCodec:
+    """
+    Splits the data in blocks of equal size, transforms them with a DCT and
+    entropy codes each block on its own, so they can be coded in parallel and
+    decoded independently.
+
+    Engines set encode_block and decode_block, module level functions so they can
+    run in a process pool, and may add fields to the header with _header_extras.
+    Extras are written in 8 bits each, after the bitdepth, and given to decode_block.
+    """
+
+    # encode_block(block, *encode_arguments) -> (bitstream, rd)
+    encode_block: Callable[..., tuple[bitarray, RD]]
+
+    # decode_block(bitstream, block_shape, *extras) -> block
+    decode_block: Callable[..., np.ndarray]
+
+    # Number of extra 8 bits fields in the header
+    number_of_extras: int = 0
+
+    def encode(
+        self,
+        data: np.ndarray,
+        lagrangian: float,
+        block_size: int = 16,
+        bitdepth: int = 8,
+        *,
+        skip: bool = False,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> bitarray:
+        """
+        The blocks are transformed in batches, with workers threads for the DCT,
+        and entropy coded in parallel by jobs processes.
+
+        With skip, blocks with too little energy to be worth a bitstream, like
+        those of prediction residuals, are neither optimized nor entropy coded.
+        """
+        extras = self._header_extras(data.ndim, bitdepth)
+        self.estimated_rd = RD()
+
+        shifted = data.astype(np.int32) - (1 << (bitdepth - 1))
+        transformed_blocks = block_dctn(shifted, block_size, workers=workers)
+        results = self._encode_blocks(
+            transformed_blocks, lagrangian, extras, skip, jobs
+        )
+
+        block_encoded_sizes = []
+        for block_bitstream, block_rd in results:
+            self.estimated_rd += block_rd
+            block_encoded_sizes.append(len(block_bitstream) // 8)
+
+        shape_bits = self._max_bits(data.shape)
+        block_bits = self._max_bits(block_encoded_sizes)
+
+        writer = BitWriter()
+        writer.write(data.ndim, 8)
+        writer.write(shape_bits, 8)
+        writer.write_many(data.shape, shape_bits)
+
+        writer.write(block_size, 16)
+        writer.write(len(block_encoded_sizes), 32)
+        writer.write(block_bits, 8)
+        writer.write_many(block_encoded_sizes, block_bits)
+
+        writer.write(bitdepth, 8)
+        writer.write_many(extras, 8)
+
+        # Blocks start at a byte boundary, so they can be read without copies
+        writer.align()
+        for block_bitstream, _ in results:
+            writer.write_bits(block_bitstream)
+
+        return writer.getvalue()
+
+    def decode(
+        self,
+        codestream: bitarray,
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> np.ndarray:
+        """
+        Blocks are entropy decoded in parallel by jobs processes,
+        and inverse transformed in batches with workers threads.
+        """
+        (
+            shape,
+            block_size,
+            block_encoded_sizes,
+            bitdepth,
+            extras,
+            payload,
+        ) = self._read_header(codestream)
+
+        block_shapes = block_shapes_equal_size(shape, block_size)
+        indexes = range(len(block_shapes))
+        transformed_blocks = self._decode_blocks(
+            payload,
+            block_encoded_sizes,
+            block_shapes,
+            indexes,
+            extras,
+            jobs,
+        )
+
+        decoded = block_idctn(transformed_blocks, shape, block_size, workers=workers)
+        decoded += 1 << (bitdepth - 1)
+        return decoded
+
+    def decode_region(
+        self,
+        codestream: bitarray,
+        window: tuple[slice, ...],
+        *,
+        jobs: int | None = None,
+    ) -> np.ndarray:
+        """
+        Decode only data[window], without entropy decoding nor transforming
+        the blocks that do not intersect the window.
+        """
+        (
+            shape,
+            block_size,
+            block_encoded_sizes,
+            bitdepth,
+            extras,
+            payload,
+        ) = self._read_header(codestream)
+        window = tuple(s.indices(size)[:2] for s, size in zip(window, shape))
+
+        # The blocks that intersect the window form a grid of their own, with
+        # partial blocks only at the borders of the data, just like the full grid
+        grid_shape = [ceil(size / block_size) for size in shape]
+        grid_ranges = [
+            range(
+                start // block_size, max(ceil(stop / block_size), start // block_size)
+            )
+            for start, stop in window
+        ]
+        region = tuple(
+            slice(blocks.start * block_size, min(blocks.stop * block_size, size))
+            for blocks, size in zip(grid_ranges, shape)
+        )
+        region_shape = [s.stop - s.start for s in region]
+
+        grid_positions = np.meshgrid(*grid_ranges, indexing="ij")
+        indexes = np.ravel_multi_index(grid_positions, grid_shape).reshape(-1).tolist()
+        block_shapes = block_shapes_equal_size(region_shape, block_size)
+        transformed_blocks = self._decode_blocks(
+            payload,
+            block_encoded_sizes,
+            block_shapes,
+            indexes,
+            extras,
+            jobs,
+        )
+
+        decoded = block_idctn(transformed_blocks, region_shape, block_size)
+        decoded += 1 << (bitdepth - 1)
+
+        crop = tuple(
+            slice(start - s.start, stop - s.start)
+            for (start, stop), s in zip(window, region)
+        )
+        return decoded[crop]
+
+    def encode_to(
+        self,
+        fileobj: BinaryIO,
+        data: np.ndarray,
+        lagrangian: float,
+        block_size: int = 16,
+        bitdepth: int = 8,
+        *,
+        skip: bool = False,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> None:
+        """
+        Streaming version of encode, writing to a file object.
+
+        The data is read one row of blocks at a time, so it can be a np.memmap
+        or anything sliced along the first axis, and each block is written as soon
+        as it is encoded. The table of block sizes goes in a trailer at the end.
+        Skipped blocks, with skip like in encode, are written with size 0.
+        """
+        extras = self._header_extras(data.ndim, bitdepth)
+        self.estimated_rd = RD()
+
+        writer = BitWriter()
+        shape_bits = self._max_bits(data.shape)
+        writer.write(data.ndim, 8)
+        writer.write(shape_bits, 8)
+        writer.write_many(data.shape, shape_bits)
+        writer.write(block_size, 16)
+        writer.write(bitdepth, 8)
+        writer.write_many(extras, 8)
+        writer.align()
+
+        header = writer.getvalue().tobytes()
+        fileobj.write(header)
+        written = len(header)
+
+        # The processes are started once for the whole stream
+        block_encoded_sizes = []
+        with block_pool(jobs) as pool:
+            for rows, _ in tile_rows(data.shape, block_size):
+                shifted = np.asarray(data[rows]).astype(np.int32) - (
+                    1 << (bitdepth - 1)
+                )
+                transformed_blocks = block_dctn(shifted, block_size, workers=workers)
+
+                for block_bitstream, block_rd in self._encode_blocks(
+                    transformed_blocks,
+                    lagrangian,
+                    extras,
+                    skip,
+                    jobs,
+                    pool,
+                ):
+                    self.estimated_rd += block_rd
+                    block_bytes = block_bitstream.tobytes()
+                    fileobj.write(block_bytes)
+                    written += len(block_bytes)
+                    block_encoded_sizes.append(len(block_bytes))
+
+        write_sizes_trailer(fileobj, block_encoded_sizes, written)
+
+    def decode_from(
+        self,
+        fileobj: BinaryIO,
+        output: np.ndarray | None = None,
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> np.ndarray:
+        """
+        Decodes a stream written by encode_to, one row of blocks at a time.
+        The file object must be seekable. The rows are written to output, which
+        can be a np.memmap to keep the decoded data out of memory too.
+        """
+        start = fileobj.tell()
+        shape, block_size, bitdepth, extras = self._read_stream_header(fileobj)
+        block_encoded_sizes = read_sizes_trailer(fileobj, start)
+
+        if output is None:
+            output = np.empty(shape, dtype=int)
+
+        first_block = 0
+        with block_pool(jobs) as pool:
+            for rows, number_of_blocks in tile_rows(shape, block_size):
+                row_sizes = block_encoded_sizes[
+                    first_block : first_block + number_of_blocks
+                ]
+                first_block += number_of_blocks
+
+                row_shape = (rows.stop - rows.start, *shape[1:])
+                payload = memoryview(fileobj.read(sum(row_sizes)))
+                transformed_blocks = self._decode_blocks(
+                    payload,
+                    row_sizes,
+                    block_shapes_equal_size(row_shape, block_size),
+                    range(number_of_blocks),
+                    extras,
+                    jobs,
+                    pool,
+                )
+
+                decoded = block_idctn(
+                    transformed_blocks, row_shape, block_size, workers=workers
+                )
+                decoded += 1 << (bitdepth - 1)
+                output[rows] = decoded
+
+        return output
+
+    def _header_extras(self, ndim: int, bitdepth: int) -> tuple[int, ...]:
+        return ()
+
+    def _encode_arguments(
+        self,
+        blocks: list[np.ndarray],
+        lagrangian: float,
+        extras: tuple[int, ...],
+    ) -> list[tuple]:
+        """
+        The arguments given to encode_block after each block.
+        """
+        return [(lagrangian, *extras)] * len(blocks)
+
+    def _encode_blocks(
+        self,
+        blocks: list[np.ndarray],
+        lagrangian: float,
+        extras: tuple[int, ...],
+        skip: bool,
+        jobs: int | None,
+        pool: BlockPool | None = None,
+    ) -> list[tuple[bitarray, RD]]:
+        if skip:
+            skipped = find_skipped_blocks(blocks, lagrangian)
+        else:
+            skipped = [False] * len(blocks)
+
+        coded_blocks = [
+            block for block, is_skipped in zip(blocks, skipped) if not is_skipped
+        ]
+        coded_arguments = iter(self._encode_arguments(coded_blocks, lagrangian, extras))
+        arguments = [
+            () if is_skipped else next(coded_arguments) for is_skipped in skipped
+        ]
+
+        return map_unskipped(
+            self.encode_block,
+            blocks,
+            arguments,
+            skipped,
+            skip_block,
+            jobs,
+            pool,
+        )
+
+    def _decode_blocks(
+        self,
+        payload: memoryview,
+        block_encoded_sizes: list[int],
+        block_shapes: list[tuple[int, ...]],
+        indexes: list[int],
+        extras: tuple[int, ...],
+        jobs: int | None,
+        pool: BlockPool | None = None,
+    ) -> list[np.ndarray]:
+        """
+        Entropy decode the blocks of the given indexes, using the table of sizes to
+        find where each one starts. The payload is byte aligned, as every block is.
+        """
+        offsets = np.concatenate([[0], np.cumsum(block_encoded_sizes)]).tolist()
+
+        bitstreams = [
+            np.frombuffer(
+                payload,
+                dtype=np.uint8,
+                count=block_encoded_sizes[i],
+                offset=offsets[i],
+            )
+            for i in indexes
+        ]
+        arguments = [(block_shape, *extras) for block_shape in block_shapes]
+        skipped = [block_encoded_sizes[i] == 0 for i in indexes]
+        return map_unskipped(
+            self.decode_block,
+            bitstreams,
+            arguments,
+            skipped,
+            zero_block,
+            jobs,
+            pool,
+        )
+
+    def _read_header(
+        self,
+        codestream: bitarray,
+    ) -> tuple[list[int], int, list[int], int, tuple[int, ...], memoryview]:
+        """
+        Reads the header, returning its fields and a view of the blocks that follow it.
+        """
+        reader = BitReader(codestream)
+        ndim = reader.read(8)
+        shape_bits = reader.read(8)
+        shape = reader.read_many(ndim, shape_bits)
+
+        block_size = reader.read(16)
+        number_of_blocks = reader.read(32)
+        block_bits = reader.read(8)
+        block_encoded_sizes = reader.read_many(number_of_blocks, block_bits)
+
+        bitdepth = reader.read(8)
+        extras = tuple(reader.read_many(self.number_of_extras, 8))
+
+        reader.align()
+        payload = reader.read_bytes(reader.remaining // 8)
+        return shape, block_size, block_encoded_sizes, bitdepth, extras, payload
+
+    def _read_stream_header(
+        self,
+        fileobj: BinaryIO,
+    ) -> tuple[list[int], int, int, tuple[int, ...]]:
+        ndim, shape_bits = fileobj.read(2)
+        header_bits = ndim * shape_bits + 16 + 8 + 8 * self.number_of_extras
+        reader = BitReader(fileobj.read(ceil(header_bits / 8)))
+
+        shape = reader.read_many(ndim, shape_bits)
+        block_size = reader.read(16)
+        bitdepth = reader.read(8)
+        extras = tuple(reader.read_many(self.number_of_extras, 8))
+        return shape, block_size, bitdepth, extras
+
+    def _max_bits(self, sequence) -> int:
+        return int(max(sequence)).bit_length()
@@ -0,0 +1,155 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from math import prod
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable
+
+import numpy as np
+
+# Each worker gets a few chunks, so a slow chunk does not hold the whole pool
+CHUNKS_PER_JOB = 4
+
+
+class BlockPool:
+    """
+    A process pool and a shared memory segment for the blocks, reused by every
+    map_blocks call given it, so a stream of calls starts the processes once.
+    """
+
+    def __init__(self, jobs: int):
+        self.jobs = jobs
+        self.executor = ProcessPoolExecutor(max_workers=jobs)
+        self._shared_memory: SharedMemory | None = None
+
+    def shared_memory(self, size: int) -> SharedMemory:
+        """
+        A segment of at least size bytes, only replaced when it is too small.
+        """
+        if self._shared_memory is None or self._shared_memory.size < size:
+            self._release_shared_memory()
+            self._shared_memory = SharedMemory(create=True, size=max(size, 1))
+        return self._shared_memory
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self._release_shared_memory()
+
+    def __enter__(self) -> "BlockPool":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _release_shared_memory(self) -> None:
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+
+def block_pool(jobs: int | None) -> BlockPool | nullcontext:
+    """
+    A BlockPool when there is more than one job, otherwise a context giving None.
+    """
+    if jobs is None or jobs <= 1:
+        return nullcontext()
+    return BlockPool(jobs)
+
+
+def map_blocks(
+    function: Callable[..., Any],
+    blocks: list[np.ndarray],
+    arguments: list[tuple],
+    jobs: int | None = None,
+    pool: BlockPool | None = None,
+) -> list[Any]:
+    """
+    Call function(block, *block_arguments) for every block, returning the results in order.
+
+    With more than one job, the blocks are split in contiguous chunks and spread
+    over a process pool. Blocks are copied once into shared memory, so only their
+    offsets and shapes are pickled. The function must be defined at module level.
+    A pool, which sets the number of jobs, avoids starting new processes every call.
+    """
+    if pool is not None:
+        jobs = pool.jobs
+
+    if jobs is None or jobs <= 1 or len(blocks) <= 1:
+        return [
+            function(block, *block_arguments)
+            for block, block_arguments in zip(blocks, arguments)
+        ]
+
+    if pool is None:
+        with BlockPool(jobs) as pool:
+            return _map_pooled(function, blocks, arguments, pool)
+    return _map_pooled(function, blocks, arguments, pool)
+
+
+def _map_pooled(
+    function: Callable[..., Any],
+    blocks: list[np.ndarray],
+    arguments: list[tuple],
+    pool: BlockPool,
+) -> list[Any]:
+    dtype = np.result_type(*blocks)
+    total_size = sum(block.size for block in blocks)
+    shared_memory = pool.shared_memory(total_size * dtype.itemsize)
+
+    shared = np.ndarray((total_size,), dtype=dtype, buffer=shared_memory.buf)
+    entries = []
+    offset = 0
+    for block, block_arguments in zip(blocks, arguments):
+        shared[offset : offset + block.size] = block.reshape(-1)
+        entries.append((offset, block.shape, block_arguments))
+        offset += block.size
+    del shared
+
+    number_of_chunks = min(len(entries), pool.jobs * CHUNKS_PER_JOB)
+    bounds = np.linspace(0, len(entries), number_of_chunks + 1).astype(int).tolist()
+
+    futures = [
+        pool.executor.submit(
+            _map_chunk,
+            function,
+            shared_memory.name,
+            dtype.str,
+            total_size,
+            entries[start:stop],
+        )
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def _attach(name: str) -> SharedMemory:
+    # Only the creator should unlink the memory, so workers do not track it
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+def _map_chunk(
+    function: Callable[..., Any],
+    name: str,
+    dtype: str,
+    total_size: int,
+    entries: list[tuple[int, tuple[int, ...], tuple]],
+) -> list[Any]:
+    shared_memory = _attach(name)
+    try:
+        shared = np.ndarray((total_size,), dtype=dtype, buffer=shared_memory.buf)
+        results = []
+        for offset, shape, block_arguments in entries:
+            # Copied, so nothing holds the shared buffer when it is closed
+            block = shared[offset : offset + prod(shape)].reshape(shape).copy()
+            results.append(function(block, *block_arguments))
+        del shared
+    finally:
+        shared_memory.close()
+
+    return results
@@ -0,0 +1,61 @@
+from typing import Any, Callable
+
+import numpy as np
+from bitarray import bitarray
+
+from pig.metrics.image_metrics import energy
+from pig.metrics.rate_distortion import RD
+
+from ._parallel import BlockPool, map_blocks
+
+# Block bitstreams are byte filled and never empty, so no block costs less than a
+# byte, and an empty block in the table of sizes means it was skipped
+SKIP_RATE = 8
+
+
+def find_skipped_blocks(blocks: list[np.ndarray], lagrangian: float) -> list[bool]:
+    """
+    Blocks whose energy, the distortion of dropping them, costs less than
+    the smallest bitstream that could code them.
+    """
+    threshold = lagrangian * SKIP_RATE
+    return [energy(block) < threshold for block in blocks]
+
+
+def skip_block(block: np.ndarray, *_) -> tuple[bitarray, RD]:
+    return bitarray(), RD(0, energy(block))
+
+
+def zero_block(bitstream: np.ndarray, block_shape: tuple[int, ...], *_) -> np.ndarray:
+    return np.zeros(block_shape, dtype=int)
+
+
+def map_unskipped(
+    function: Callable[..., Any],
+    blocks: list[np.ndarray],
+    arguments: list[tuple],
+    skipped: list[bool],
+    fill: Callable[..., Any],
+    jobs: int | None = None,
+    pool: BlockPool | None = None,
+) -> list[Any]:
+    """
+    Like map_blocks, but skipped blocks get fill(block, *block_arguments) instead,
+    without ever reaching the process pool.
+    """
+    coded = [i for i, is_skipped in enumerate(skipped) if not is_skipped]
+    results = map_blocks(
+        function,
+        [blocks[i] for i in coded],
+        [arguments[i] for i in coded],
+        jobs,
+        pool,
+    )
+
+    output = [None] * len(blocks)
+    for i, result in zip(coded, results):
+        output[i] = result
+    for i, is_skipped in enumerate(skipped):
+        if is_skipped:
+            output[i] = fill(blocks[i], *arguments[i])
+    return output
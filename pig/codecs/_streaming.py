@@ -0,0 +1,60 @@
+from math import ceil, prod
+from typing import BinaryIO, Generator
+
+from pig.utils.bit_stream import BitReader, BitWriter
+
+# The last bytes of a stream hold the offset of the trailer with the block sizes
+TRAILER_OFFSET_BYTES = 8
+
+
+def tile_rows(
+    shape: tuple[int, ...],
+    block_size: int,
+) -> Generator[tuple[slice, int], None, None]:
+    """
+    Rows of blocks along the first axis, with the number of blocks in each row.
+    Their blocks come in the same order as in split_blocks_equal_size.
+    """
+    blocks_per_row = prod(ceil(size / block_size) for size in shape[1:])
+    for start in range(0, shape[0], block_size):
+        yield slice(start, min(start + block_size, shape[0])), blocks_per_row
+
+
+def write_sizes_trailer(
+    fileobj: BinaryIO, block_encoded_sizes: list[int], offset: int
+) -> None:
+    """
+    Writes the table of block sizes after the blocks, followed by its offset from
+    the start of the stream, so the blocks can be written as soon as they are encoded.
+    """
+    block_bits = int(max(block_encoded_sizes, default=0)).bit_length()
+
+    writer = BitWriter()
+    writer.write(len(block_encoded_sizes), 32)
+    writer.write(block_bits, 8)
+    writer.write_many(block_encoded_sizes, block_bits)
+    writer.align()
+
+    fileobj.write(writer.getvalue().tobytes())
+    fileobj.write(offset.to_bytes(TRAILER_OFFSET_BYTES, "big"))
+
+
+def read_sizes_trailer(fileobj: BinaryIO, start: int) -> list[int]:
+    """
+    Reads the table of block sizes of a stream that begins at start,
+    leaving the stream where it was. The stream must be seekable.
+    """
+    position = fileobj.tell()
+
+    fileobj.seek(-TRAILER_OFFSET_BYTES, 2)
+    end = fileobj.tell()
+    offset = start + int.from_bytes(fileobj.read(TRAILER_OFFSET_BYTES), "big")
+
+    fileobj.seek(offset)
+    reader = BitReader(fileobj.read(end - offset))
+    number_of_blocks = reader.read(32)
+    block_bits = reader.read(8)
+    block_encoded_sizes = reader.read_many(number_of_blocks, block_bits)
+
+    fileobj.seek(position)
+    return block_encoded_sizes
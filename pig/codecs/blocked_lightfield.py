@@ -0,0 +1,92 @@
+import numpy as np
+from bitarray import bitarray
+
+from pig.media import LazyLightField, RawLightField
+from pig.metrics.rate_distortion import RD
+from pig.utils.bit_stream import BitReader, BitWriter
+
+from .blocked_mico import BlockedMico
+from .blocked_mule import BlockedMule
+
+ENTROPY_CODECS = {
+    "mule": BlockedMule,
+    "mico": BlockedMico,
+}
+
+
+class BlockedLightField:
+    """
+    Codes each channel of a light field as a 4-D (t, s, v, u) signal, split in
+    4-D blocks with a 4-D DCT. A block spans several views, so what the views
+    have in common ends up in a few coefficients instead of being coded once per view.
+    """
+
+    def encode(
+        self,
+        lightfield: RawLightField | LazyLightField,
+        lagrangian: float,
+        block_size: int = 16,
+        entropy: str = "mule",
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> bitarray:
+        """
+        Blocks are entropy coded with either "mule" or "mico". With the default block
+        size, a light field with up to 16 x 16 views is not split in the angular axes.
+        """
+        if entropy not in ENTROPY_CODECS:
+            raise ValueError(f'Invalid entropy codec "{entropy}"')
+
+        self.estimated_rd = RD()
+        codec = ENTROPY_CODECS[entropy]()
+
+        channel_codestreams = []
+        for channel in range(lightfield.channels()):
+            data = np.asarray(lightfield.get_channel(channel))
+            codestream = codec.encode(
+                data,
+                lagrangian,
+                block_size,
+                lightfield.bitdepth,
+                workers=workers,
+                jobs=jobs,
+            )
+            self.estimated_rd += codec.estimated_rd
+            channel_codestreams.append(codestream)
+
+        writer = BitWriter()
+        writer.write(list(ENTROPY_CODECS).index(entropy), 8)
+        writer.write(lightfield.bitdepth, 8)
+        writer.write(len(channel_codestreams), 8)
+
+        # The codestream of each channel is made of whole bytes
+        writer.write_many(
+            (len(codestream) // 8 for codestream in channel_codestreams), 32
+        )
+        writer.align()
+        for codestream in channel_codestreams:
+            writer.write_bits(codestream)
+
+        return writer.getvalue()
+
+    def decode(
+        self,
+        codestream: bitarray,
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> RawLightField:
+        reader = BitReader(codestream)
+        entropy = list(ENTROPY_CODECS)[reader.read(8)]
+        bitdepth = reader.read(8)
+        n_channels = reader.read(8)
+        channel_sizes = reader.read_many(n_channels, 32)
+        reader.align()
+
+        codec = ENTROPY_CODECS[entropy]()
+        channels = [
+            codec.decode(reader.read_bits(8 * size), workers=workers, jobs=jobs)
+            for size in channel_sizes
+        ]
+        return RawLightField(np.stack(channels, axis=-1), bitdepth=bitdepth)
@@ -1,112 +1,66 @@
-from math import ceil
-
 import numpy as np
 from bitarray import bitarray
-from scipy.fft import dctn, idctn
 
 from pig.entropy import MicoDecoder, MicoEncoder
+from pig.entropy.mico.mico_optimizer import MicoOptimizer
 from pig.metrics.rate_distortion import RD
-from pig.utils.block_utils import split_blocks_equal_size
-
-
-class BlockedMico:
-    def encode(
-        self,
-        data: np.ndarray,
-        lagrangian: float,
-        block_size: int = 16,
-        bitdepth: int = 8,
-    ) -> bitarray:
-        bitstream = bitarray()
-        block_encoded_sizes = []
-        self.estimated_rd = RD()
-
-        shifted = data.astype(np.int32) - (1 << (bitdepth - 1))
-        for block in split_blocks_equal_size(shifted, block_size):
-            mico_encoder = MicoEncoder()
-            transformed_block: np.ndarray = dctn(block, norm="ortho")
-            transformed_block = transformed_block.round().astype(int)
-            block_bitstream = mico_encoder.encode(
-                transformed_block,
-                lagrangian,
-            )
-            self.estimated_rd += mico_encoder.estimated_rd
-            bitstream += block_bitstream
-            block_encoded_sizes.append(len(block_bitstream) // 8)
-
-        shape_bits = self._max_bits(data.shape)
-        block_bits = self._max_bits(block_encoded_sizes)
 
-        header = bitarray()
-        self._add_bits(header, 8, data.ndim)
-        self._add_bits(header, 8, shape_bits)
-        for size in data.shape:
-            self._add_bits(header, shape_bits, size)
+from ._blocked import BlockedCodec
 
-        self._add_bits(header, 16, block_size)
-        self._add_bits(header, 32, len(block_encoded_sizes))
-        self._add_bits(header, 8, block_bits)
-        for size in block_encoded_sizes:
-            self._add_bits(header, block_bits, size)
 
-        self._add_bits(header, 8, bitdepth)
+def _encode_block(
+    block: np.ndarray,
+    lagrangian: float,
+    level_bitplanes: np.ndarray,
+) -> tuple[bitarray, RD]:
+    mico_encoder = MicoEncoder()
+    block_bitstream = mico_encoder.encode(
+        block,
+        lagrangian,
+        level_bitplanes=level_bitplanes,
+    )
+    return block_bitstream, mico_encoder.estimated_rd
 
-        return header + bitstream
 
-    def decode(self, codestream: bitarray) -> np.ndarray:
-        codestream = codestream.copy()
-        ndim = self._consume_bits(codestream, 8)
-        shape_bits = self._consume_bits(codestream, 8)
-        shape = list()
-        for _ in range(ndim):
-            size = self._consume_bits(codestream, shape_bits)
-            shape.append(size)
+def _decode_block(bitstream: np.ndarray, block_shape: tuple[int, ...]) -> np.ndarray:
+    block_bitstream = bitarray(buffer=bitstream)
+    mico_decoder = MicoDecoder()
+    return mico_decoder.decode(block_bitstream, block_shape)
 
-        block_size = self._consume_bits(codestream, 16)
-        number_of_blocks = self._consume_bits(codestream, 32)
-        block_bits = self._consume_bits(codestream, 8)
 
-        block_encoded_sizes = []
-        for _ in range(number_of_blocks):
-            size = self._consume_bits(codestream, block_bits)
-            block_encoded_sizes.append(size)
+class BlockedMico(BlockedCodec):
+    """
+    Blocks are coded with MICO, with their level bitplanes found in batches.
+    """
 
-        bitdepth = self._consume_bits(codestream, 8)
+    encode_block = staticmethod(_encode_block)
+    decode_block = staticmethod(_decode_block)
 
-        last_pos = 0
-        bitstreams: list[bitarray] = list()
-        for size in block_encoded_sizes:
-            start = last_pos
-            end = start + size * 8
-            bitstreams.append(codestream[start:end])
-            last_pos = end
-
-        decoded = np.zeros(shape, dtype=int)
-        for bitstream, block in zip(bitstreams, split_blocks_equal_size(decoded, block_size)):
-            mico_decoder = MicoDecoder()
-            transformed_block = mico_decoder.decode(
-                bitstream,
-                block.shape,
+    def _encode_arguments(
+        self,
+        blocks: list[np.ndarray],
+        lagrangian: float,
+        extras: tuple[int, ...],
+    ) -> list[tuple]:
+        return [
+            (lagrangian, bitplanes) for bitplanes in self._find_level_bitplanes(blocks)
+        ]
+
+    def _find_level_bitplanes(self, blocks: list[np.ndarray]) -> list[np.ndarray]:
+        """
+        Blocks of the same shape have their level bitplanes found in a single batch.
+        """
+        indexes_per_shape: dict[tuple[int, ...], list[int]] = {}
+        for i, block in enumerate(blocks):
+            indexes_per_shape.setdefault(block.shape, []).append(i)
+
+        level_bitplanes = [None] * len(blocks)
+        for indexes in indexes_per_shape.values():
+            stack = np.stack([blocks[i] for i in indexes])
+            stacked_bitplanes = MicoOptimizer.find_bitplane_per_level(
+                stack, stacked=True
             )
-            decoded_block: np.ndarray = idctn(transformed_block, norm="ortho")
-            decoded_block = decoded_block.round().astype(int)
-            block[:] = decoded_block
-
-        decoded += 1 << (bitdepth - 1)
-        return decoded
-
-    def _add_bits(self, codestram: bitarray, number_of_bits: int, value: int) -> None:
-        bits = f"{value:0{number_of_bits}b}"
-        codestram.extend(bits)
-
-    def _consume_bits(self, codestream: bitarray, number_of_bits: int) -> int:
-        section = codestream[:number_of_bits]
-        left_fill = bitarray(section.padbits * "0")
-        section = left_fill + section
-
-        value = int.from_bytes(section.tobytes())
-        codestream[:] = codestream[number_of_bits:]
-        return value
+            for i, bitplanes in zip(indexes, stacked_bitplanes):
+                level_bitplanes[i] = bitplanes
 
-    def _max_bits(self, sequence) -> int:
-        return int(max(sequence)).bit_length()
+        return level_bitplanes
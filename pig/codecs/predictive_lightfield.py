@@ -0,0 +1,235 @@
+import numpy as np
+from bitarray import bitarray
+
+from pig.media import LazyLightField, RawLightField
+from pig.metrics.rate_distortion import RD
+from pig.utils.bit_stream import BitReader, BitWriter
+
+from .blocked_lightfield import ENTROPY_CODECS
+
+# Disparities are written with this offset, so they can be negative
+DISPARITY_OFFSET = 1 << 7
+
+
+class PredictiveLightField:
+    """
+    Codes the central view of each channel on its own, and every other view as
+    the residual against a prediction from an already decoded neighbour, one
+    step closer to the center. The prediction is the neighbour shifted by the
+    disparity between adjacent views.
+
+    Residual blocks with too little energy to be worth coding are skipped,
+    so they cost neither optimization nor entropy coding.
+    """
+
+    def encode(
+        self,
+        lightfield: RawLightField | LazyLightField,
+        lagrangian: float,
+        block_size: int = 16,
+        entropy: str = "mule",
+        disparity: int | None = 0,
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> bitarray:
+        """
+        With disparity None, the disparity of each channel is estimated from
+        the views next to the center.
+        """
+        if entropy not in ENTROPY_CODECS:
+            raise ValueError(f'Invalid entropy codec "{entropy}"')
+
+        self.estimated_rd = RD()
+        codec = ENTROPY_CODECS[entropy]()
+        bitdepth = lightfield.bitdepth
+        t_size, s_size = lightfield.t(), lightfield.s()
+        max_value = (1 << bitdepth) - 1
+        codec_arguments = dict(block_size=block_size, workers=workers, jobs=jobs)
+
+        disparities = []
+        view_codestreams = []
+        for channel in range(lightfield.channels()):
+            data = np.asarray(lightfield.get_channel(channel))
+            channel_disparity = (
+                self._estimate_disparity(data) if disparity is None else disparity
+            )
+            if not -DISPARITY_OFFSET <= channel_disparity < DISPARITY_OFFSET:
+                raise ValueError(f'Invalid disparity "{channel_disparity}"')
+            disparities.append(channel_disparity)
+
+            decoded = np.empty(data.shape, dtype=int)
+            for t, s, reference in self._coding_order(t_size, s_size):
+                view = data[t, s].astype(np.int32)
+
+                if reference is None:
+                    codestream = codec.encode(
+                        view,
+                        lagrangian,
+                        bitdepth=bitdepth,
+                        **codec_arguments,
+                    )
+                    decoded[t, s] = codec.decode(codestream, workers=workers, jobs=jobs)
+                else:
+                    prediction = self._predict(
+                        decoded, t, s, reference, channel_disparity
+                    )
+                    codestream = codec.encode(
+                        view - prediction + (1 << bitdepth),
+                        lagrangian,
+                        bitdepth=bitdepth + 1,
+                        skip=True,
+                        **codec_arguments,
+                    )
+                    residual = codec.decode(codestream, workers=workers, jobs=jobs)
+                    decoded[t, s] = np.clip(
+                        prediction + residual - (1 << bitdepth), 0, max_value
+                    )
+
+                self.estimated_rd += codec.estimated_rd
+                view_codestreams.append(codestream)
+
+        writer = BitWriter()
+        writer.write(list(ENTROPY_CODECS).index(entropy), 8)
+        writer.write(bitdepth, 8)
+        writer.write(len(disparities), 8)
+        writer.write(t_size, 16)
+        writer.write(s_size, 16)
+        writer.write_many((value + DISPARITY_OFFSET for value in disparities), 8)
+
+        # The codestream of each view is made of whole bytes
+        writer.write_many((len(codestream) // 8 for codestream in view_codestreams), 32)
+        writer.align()
+        for codestream in view_codestreams:
+            writer.write_bits(codestream)
+
+        return writer.getvalue()
+
+    def decode(
+        self,
+        codestream: bitarray,
+        *,
+        workers: int | None = None,
+        jobs: int | None = None,
+    ) -> RawLightField:
+        reader = BitReader(codestream)
+        entropy = list(ENTROPY_CODECS)[reader.read(8)]
+        bitdepth = reader.read(8)
+        n_channels = reader.read(8)
+        t_size = reader.read(16)
+        s_size = reader.read(16)
+        disparities = [
+            value - DISPARITY_OFFSET for value in reader.read_many(n_channels, 8)
+        ]
+        view_sizes = iter(reader.read_many(n_channels * t_size * s_size, 32))
+        reader.align()
+
+        codec = ENTROPY_CODECS[entropy]()
+        max_value = (1 << bitdepth) - 1
+
+        channels = []
+        for channel_disparity in disparities:
+            decoded = None
+            for t, s, reference in self._coding_order(t_size, s_size):
+                view_codestream = reader.read_bits(8 * next(view_sizes))
+                view = codec.decode(view_codestream, workers=workers, jobs=jobs)
+
+                if decoded is None:
+                    decoded = np.empty((t_size, s_size, *view.shape), dtype=int)
+
+                if reference is None:
+                    decoded[t, s] = view
+                else:
+                    prediction = self._predict(
+                        decoded, t, s, reference, channel_disparity
+                    )
+                    decoded[t, s] = np.clip(
+                        prediction + view - (1 << bitdepth), 0, max_value
+                    )
+
+            channels.append(decoded)
+
+        return RawLightField(np.stack(channels, axis=-1), bitdepth=bitdepth)
+
+    def _coding_order(
+        self, t_size: int, s_size: int
+    ) -> list[tuple[int, int, tuple | None]]:
+        """
+        Views sorted by their distance to the center, each with the neighbour that
+        predicts it, one step closer to the center, so it is always decoded before.
+        """
+        center_t, center_s = t_size // 2, s_size // 2
+
+        order = []
+        for t, s in np.ndindex(t_size, s_size):
+            if (t, s) == (center_t, center_s):
+                reference = None
+            elif t != center_t:
+                reference = (t - int(np.sign(t - center_t)), s)
+            else:
+                reference = (t, s - int(np.sign(s - center_s)))
+            distance = abs(t - center_t) + abs(s - center_s)
+            order.append((distance, t, s, reference))
+
+        order.sort(key=lambda entry: entry[:3])
+        return [(t, s, reference) for _, t, s, reference in order]
+
+    def _predict(
+        self,
+        decoded: np.ndarray,
+        t: int,
+        s: int,
+        reference: tuple[int, int],
+        disparity: int,
+    ) -> np.ndarray:
+        reference_t, reference_s = reference
+        shift_v = disparity * (t - reference_t)
+        shift_u = disparity * (s - reference_s)
+        return self._shift_view(decoded[reference_t, reference_s], shift_v, shift_u)
+
+    def _shift_view(self, view: np.ndarray, shift_v: int, shift_u: int) -> np.ndarray:
+        """
+        Moves the content of the view, repeating its edges where nothing is known.
+        """
+        v_size, u_size = view.shape
+        pad_v, pad_u = abs(shift_v), abs(shift_u)
+        padded = np.pad(view, ((pad_v, pad_v), (pad_u, pad_u)), mode="edge")
+        start_v, start_u = pad_v - shift_v, pad_u - shift_u
+        return padded[start_v : start_v + v_size, start_u : start_u + u_size]
+
+    def _estimate_disparity(self, data: np.ndarray, max_disparity: int = 4) -> int:
+        """
+        The disparity that best predicts the views next to the center from it.
+        """
+        t_size, s_size = data.shape[:2]
+        center_t, center_s = t_size // 2, s_size // 2
+        center = data[center_t, center_s].astype(np.int64)
+
+        neighbours = [
+            (t, s)
+            for t, s in [
+                (center_t - 1, center_s),
+                (center_t + 1, center_s),
+                (center_t, center_s - 1),
+                (center_t, center_s + 1),
+            ]
+            if 0 <= t < t_size and 0 <= s < s_size
+        ]
+        if not neighbours:
+            return 0
+
+        def error(disparity: int) -> float:
+            total = 0
+            for t, s in neighbours:
+                shift_v, shift_u = (
+                    disparity * (t - center_t),
+                    disparity * (s - center_s),
+                )
+                total += np.abs(
+                    data[t, s] - self._shift_view(center, shift_v, shift_u)
+                ).sum()
+            return total
+
+        return min(
+            range(-max_disparity, max_disparity + 1), key=lambda d: (error(d), abs(d))
+        )
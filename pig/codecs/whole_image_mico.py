@@ -3,6 +3,7 @@ from bitarray import bitarray
 from scipy.fft import dctn, idctn
 
 from pig.entropy import MicoDecoder, MicoEncoder
+from pig.utils.bit_stream import BitReader, BitWriter
 
 
 class WholeImageMico:
@@ -12,37 +13,29 @@ class WholeImageMico:
 
         mico_encoder = MicoEncoder()
 
-        header = bitarray()
-        header.extend(f"{data.ndim:08b}")
-        for size in data.shape:
-            header.extend(f"{size:032b}")
+        writer = BitWriter()
+        writer.write(data.ndim, 8)
+        writer.write_many(data.shape, 32)
 
         bitstream = mico_encoder.encode(
             transformed,
             lagrangian,
         )
-        return header + bitstream
+        writer.write_bits(bitstream)
+        return writer.getvalue()
 
     def decode(self, codestream: bitarray) -> np.ndarray:
-        codestream = codestream.copy()
+        reader = BitReader(codestream)
         mico_decoder = MicoDecoder()
 
-        ndim = self._consume_bytes(codestream, 8)
-        shape = list()
-        for _ in range(ndim):
-            size = self._consume_bytes(codestream, 32)
-            shape.append(size)
+        ndim = reader.read(8)
+        shape = reader.read_many(ndim, 32)
 
         transformed_decoded = mico_decoder.decode(
-            codestream,
+            reader.read_bits(reader.remaining),
             shape,
         )
 
         decoded: np.ndarray = idctn(transformed_decoded, norm="ortho")
         decoded = decoded.round().astype(int)
         return decoded
-
-    def _consume_bytes(self, codestream: bitarray, number_of_bytes: int) -> bitarray:
-        value = int.from_bytes(codestream[:number_of_bytes].tobytes())
-        codestream[:] = codestream[number_of_bytes:]
-        return value
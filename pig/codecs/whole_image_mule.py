@@ -3,6 +3,8 @@ from bitarray import bitarray
 from scipy.fft import dctn, idctn
 
 from pig.entropy import MuleDecoder, MuleEncoder
+from pig.entropy.mule.mule_optimizer import MuleOptimizer
+from pig.utils.bit_stream import BitReader, BitWriter
 
 
 class WholeImageMule:
@@ -10,35 +12,32 @@ class WholeImageMule:
         transformed: np.ndarray = dctn(data, norm="ortho")
         transformed = transformed.round().astype(int)
 
-        max_bitplane = MuleEncoder.find_max_bitplane(transformed)
+        max_bitplane = MuleOptimizer.find_max_bitplane(transformed)
         mule_encoder = MuleEncoder()
 
-        header = bitarray()
-        header.extend(f"{data.ndim:08b}")
-        for size in data.shape:
-            header.extend(f"{size:032b}")
-        header.extend(f"{max_bitplane:08b}")
+        writer = BitWriter()
+        writer.write(data.ndim, 8)
+        writer.write_many(data.shape, 32)
+        writer.write(max_bitplane, 8)
 
         bitstream = mule_encoder.encode(
             transformed,
             lagrangian,
             upper_bitplane=max_bitplane,
         )
-        return header + bitstream
+        writer.write_bits(bitstream)
+        return writer.getvalue()
 
     def decode(self, codestream: bitarray) -> np.ndarray:
-        codestream = codestream.copy()
+        reader = BitReader(codestream)
         mule_decoder = MuleDecoder()
 
-        ndim = self._consume_bytes(codestream, 8)
-        shape = list()
-        for _ in range(ndim):
-            size = self._consume_bytes(codestream, 32)
-            shape.append(size)
+        ndim = reader.read(8)
+        shape = reader.read_many(ndim, 32)
 
-        max_bitplane = self._consume_bytes(codestream, 8)
+        max_bitplane = reader.read(8)
         transformed_decoded = mule_decoder.decode(
-            codestream,
+            reader.read_bits(reader.remaining),
             shape,
             upper_bitplane=max_bitplane,
         )
@@ -46,8 +45,3 @@ class WholeImageMule:
         decoded: np.ndarray = idctn(transformed_decoded, norm="ortho")
         decoded = decoded.round().astype(int)
         return decoded
-
-    def _consume_bytes(self, codestream: bitarray, number_of_bytes: int) -> bitarray:
-        value = int.from_bytes(codestream[:number_of_bytes].tobytes())
-        codestream[:] = codestream[number_of_bytes:]
-        return value
@@ -1,8 +1,13 @@
 # isort:skip_file
 from .probability_model.frequentist_pm import FrequentistPM
 from .probability_model.exponential_smoothing_pm import ExponentialSmoothingPM
+from .probability_model.state_machine_pm import StateMachinePM
 from .cabac.cabac_encoder import CabacEncoder
 from .cabac.cabac_decoder import CabacDecoder
+from .range_coder.range_encoder import RangeEncoder
+from .range_coder.range_decoder import RangeDecoder
+from .rans.rans_encoder import RansEncoder
+from .rans.rans_decoder import RansDecoder
 from .mule.mule_encoder import MuleEncoder
 from .mule.mule_decoder import MuleDecoder
 from .mico.mico_encoder import MicoEncoder
@@ -12,10 +17,15 @@ from .mico.mico_decoder import MicoDecoder
 __all__ = [
     "CabacEncoder",
     "CabacDecoder",
+    "RangeEncoder",
+    "RangeDecoder",
+    "RansEncoder",
+    "RansDecoder",
     "MuleEncoder",
     "MuleDecoder",
     "FrequentistPM",
     "ExponentialSmoothingPM",
+    "StateMachinePM",
     "MicoEncoder",
     "MicoDecoder",
 ]
@@ -9,7 +9,12 @@ class CabacDecoder:
     Based on https://github.com/ramenhut/abac/blob/master/cabac.cpp
     """
 
-    def __init__(self):
+    def __init__(self, forward: bool = False):
+        """
+        With forward=True the codestream is read from the first bit to the last one,
+        matching a CabacEncoder(forward=True). Otherwise it is read backwards.
+        """
+        self.forward = forward
         self.configure_precision(16)
 
     def configure_precision(self, precision: int):
@@ -28,6 +33,9 @@ class CabacDecoder:
 
         self.buffer = bitarray()
         self.result = bitarray()
+        self._cursor = 0
+        self._step = 1
+        self._remaining = 0
 
         self.low = 0
         self.mid = self._half_range
@@ -38,7 +46,7 @@ class CabacDecoder:
 
     def decode(
         self,
-        bits: bitarray,
+        bits: bitarray | bytes | memoryview,
         size: int,
         *,
         model: FrequentistPM | None = None,
@@ -50,12 +58,27 @@ class CabacDecoder:
 
         return self.end()
 
-    def start(self, bits: bitarray, result: bitarray | None = None):
+    def start(
+        self, bits: bitarray | bytes | memoryview, result: bitarray | None = None
+    ):
         self.clear()
         if result is not None:
             self.result = result
 
-        self.buffer = bits.copy()
+        # The codestream is never copied, it is only read through a cursor
+        if isinstance(bits, bitarray):
+            self.buffer = bits
+        else:
+            self.buffer = bitarray(buffer=bits)
+
+        self._remaining = len(self.buffer)
+        if self.forward:
+            self._cursor = 0
+            self._step = 1
+        else:
+            self._cursor = len(self.buffer) - 1
+            self._step = -1
+
         self._read_first_word()
         return self
 
@@ -84,6 +107,25 @@ class CabacDecoder:
         self._resolve_scaling()
         return output
 
+    def decode_bypass(self, number_of_bits: int) -> int:
+        value = 0
+
+        for _ in range(number_of_bits):
+            self.mid = self.low + ((self.high - self.low) >> 1)
+
+            if self.current <= self.mid:
+                self.high = self.mid
+                self.result.append(0)
+                value <<= 1
+            else:
+                self.low = self.mid + 1
+                self.result.append(1)
+                value = (value << 1) | 1
+
+            self._resolve_scaling()
+
+        return value
+
     def end(self):
         return self.result
 
@@ -91,14 +133,16 @@ class CabacDecoder:
     def _read_first_word(self):
         bit = 0
         for _ in range(self.entropy_precision):
-            if self.buffer:
-                bit = self.buffer.pop()
+            if self._remaining:
+                bit = self.buffer[self._cursor]
+                self._cursor += self._step
+                self._remaining -= 1
             self.current = (self.current << 1) | bit
             self.read_bits += 1
 
     def _update_table(self):
         current_range = self.high - self.low
-        mid_range = int(current_range * self.probability_model.probability(0))
+        mid_range = self.probability_model.split_range(current_range)
         self.mid = self.low + mid_range
 
     def _resolve_scaling(self):
@@ -123,8 +167,10 @@ class CabacDecoder:
             else:
                 return
 
-            if self.buffer:
-                bit = self.buffer.pop()
+            if self._remaining:
+                bit = self.buffer[self._cursor]
+                self._cursor += self._step
+                self._remaining -= 1
                 self.read_bits += 1
 
             self.high = ((self.high << 1) & self._full_range) | 1
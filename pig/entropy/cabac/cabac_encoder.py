@@ -11,7 +11,12 @@ class CabacEncoder:
     Based on https://github.com/ramenhut/abac/blob/master/cabac.cpp
     """
 
-    def __init__(self):
+    def __init__(self, forward: bool = False):
+        """
+        With forward=True the codestream is kept in the order it is produced,
+        to be read by a CabacDecoder(forward=True). Otherwise it is reversed at the end.
+        """
+        self.forward = forward
         self.configure_precision(16)
         self.clear()
 
@@ -77,17 +82,33 @@ class CabacEncoder:
 
         self._resolve_scaling()
 
+    def encode_bypass(self, bits: int, number_of_bits: int):
+        """
+        Encode the number_of_bits least significant bits of bits, starting from the
+        most significant one, as equiprobable bins that skip the probability models.
+        """
+        for i in reversed(range(number_of_bits)):
+            self.mid = self.low + ((self.high - self.low) >> 1)
+
+            if (bits >> i) & 1:
+                self.low = self.mid + 1
+            else:
+                self.high = self.mid
+
+            self._resolve_scaling()
+
     def end(self, fill_to_byte: bool = False):
         self._flush()
         if fill_to_byte:
             self.result.fill()
-        self.result.reverse()
+        if not self.forward:
+            self.result.reverse()
         return self.result
 
     # Internal use
     def _update_table(self):
         current_range = self.high - self.low
-        mid_range = int(current_range * self.probability_model.probability(0))
+        mid_range = self.probability_model.split_range(current_range)
         self.mid = self.low + mid_range
 
     def _resolve_scaling(self):
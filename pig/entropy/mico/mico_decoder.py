@@ -1,13 +1,11 @@
-from functools import cache
-
 import numpy as np
 from bitarray import bitarray
 
 from pig.entropy import CabacDecoder
-from pig.utils.block_utils import bigger_possible_slice, split_shape_in_half
 
 from .mico_probability_handler import MicoProbabilityHandler
-from .utils import get_level, get_shape_levels, max_level
+from .partition_tree import get_partition_tree
+from .utils import max_level
 
 
 class MicoDecoder:
@@ -15,7 +13,10 @@ class MicoDecoder:
     Multidimensional Image COdec - Decoder
     """
 
-    def __init__(self):
+    def __init__(self, *, bypass_signs: bool = False, bypass_bitplanes: int = 0):
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
+
         self.block: np.ndarray = np.array([], dtype=np.int32)
         self.block_levels: np.ndarray = np.array([], dtype=np.int32)
         self.level_bitplanes: np.ndarray = np.array([], dtype=np.int32)
@@ -30,51 +31,55 @@ class MicoDecoder:
         shape: tuple[int],
     ) -> np.ndarray:
         self.block = np.zeros(shape, dtype=np.int32)
-        self.block_levels = get_shape_levels(shape)
+        self.flat_block = self.block.reshape(-1)
+        self.tree = get_partition_tree(tuple(shape))
+        self.block_levels = self.tree.levels
 
         self.cabac.start(bitstream)
         self.decode_bitplane_sizes()
-        self.apply_decoding(bigger_possible_slice(shape))
+        self.apply_decoding(0)
         self.cabac.end()
         return self.block
 
-    def apply_decoding(self, block_position: tuple[slice]):
-        sub_block = self.block[block_position]
-        sub_levels = self.block_levels[block_position]
-        upper_bitplanes = self.level_bitplanes[sub_levels]
-
-        if np.all(upper_bitplanes <= self.lower_bitplane):
+    def apply_decoding(self, node: int):
+        upper_bitplane = self.get_bitplane(node)
+        if upper_bitplane <= self.lower_bitplane:
             return
 
-        if np.all(upper_bitplanes <= 0):
+        if upper_bitplane <= 0:
             return
 
-        flag = self.decode_flag(block_position)
+        flag = self.decode_flag(node)
 
         if flag == "S":  # Split
-            for sub_pos in split_shape_in_half(block_position):
-                self.apply_decoding(sub_pos)
+            for child in self.tree.children[node]:
+                self.apply_decoding(child)
 
         elif flag == "E":  # Empty
-            assert sub_block.size != 1
+            assert self.tree.sizes[node] != 1
             return
 
         elif flag == "F":  # Full
-            for i, upper_bitplane in np.ndenumerate(upper_bitplanes):
-                sub_block[i] = self.decode_int(
+            offsets = self.tree.offsets[node]
+            upper_bitplanes = self.level_bitplanes[self.tree.flat_levels[offsets]]
+            for offset, upper_bitplane in zip(
+                offsets.tolist(), upper_bitplanes.tolist()
+            ):
+                self.flat_block[offset] = self.decode_int(
                     self.lower_bitplane,
                     upper_bitplane,
                     signed=True,
                 )
 
         elif flag == "z":  # Zero
-            assert sub_block.size == 1
+            assert self.tree.sizes[node] == 1
             return
 
         elif flag == "v":  # Value
-            assert sub_block.size == 1
-            bitplane = self.get_bitplane(block_position)
-            self.block[block_position] = self.decode_int(
+            assert self.tree.sizes[node] == 1
+            offset = self.tree.offsets[node][0]
+            bitplane = self.level_bitplanes[self.tree.flat_levels[offset]]
+            self.flat_block[offset] = self.decode_int(
                 self.lower_bitplane,
                 bitplane,
                 signed=True,
@@ -106,20 +111,32 @@ class MicoDecoder:
     ) -> int:
         value = 0
 
-        for i in range(lower_bitplane, upper_bitplane):
+        bypass_bitplane = min(
+            max(self.bypass_bitplanes, lower_bitplane), upper_bitplane
+        )
+        if bypass_bitplane > lower_bitplane:
+            value = (
+                self.cabac.decode_bypass(bypass_bitplane - lower_bitplane)
+                << lower_bitplane
+            )
+
+        for i in range(bypass_bitplane, upper_bitplane):
             bit = self.cabac.decode_bit(model=self.prob_handler.int_model(i))
             value |= bit << i
 
         if signed and value != 0:
-            signal = self.cabac.decode_bit(model=self.prob_handler.signal_model())
+            if self.bypass_signs:
+                signal = self.cabac.decode_bypass(1)
+            else:
+                signal = self.cabac.decode_bit(model=self.prob_handler.signal_model())
             if signal:
                 value = -value
 
         return value
 
-    def decode_flag(self, block_position: tuple[slice]):
-        unitary = self.block[block_position].size == 1
-        max_bp = self.get_bitplane(block_position)
+    def decode_flag(self, node: int):
+        unitary = self.tree.sizes[node] == 1
+        max_bp = self.get_bitplane(node)
 
         if unitary:
             unit_model = self.prob_handler.unit_model()
@@ -145,8 +162,5 @@ class MicoDecoder:
             else:
                 return "E"
 
-    def get_bitplane(self, block_position: tuple[slice]):
-        level = get_level(block_position)
-        if level >= len(self.level_bitplanes):
-            return self.level_bitplanes[-1]
-        return self.level_bitplanes[level]
+    def get_bitplane(self, node: int):
+        return self.level_bitplanes[self.tree.bitplane_indexes[node]]
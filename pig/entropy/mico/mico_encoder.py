@@ -5,11 +5,9 @@ from bitarray import bitarray
 
 from pig.entropy import CabacEncoder
 from pig.metrics import RD
-from pig.utils.block_utils import bigger_possible_slice, split_shape_in_half
 
 from .mico_optimizer import MicoOptimizer
 from .mico_probability_handler import MicoProbabilityHandler
-from .utils import get_level
 
 Flags = deque[str]
 
@@ -22,7 +20,23 @@ class MicoEncoder:
     Multidimensional Image COdec - Encoder
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        bypass_signs: bool = False,
+        bypass_bitplanes: int = 0,
+        cost_table: bool = False,
+    ):
+        """
+        Signs (if bypass_signs) and bitplanes below bypass_bitplanes are coded
+        as equiprobable bins, skipping the probability models.
+        With cost_table the optimizer estimates the rate of single bits from
+        precomputed tables, batches of bits are always estimated exactly.
+        """
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
+        self.cost_table = cost_table
+
         self.block: np.ndarray = np.array([], dtype=np.int32)
         self.block_levels: np.ndarray = np.array([], dtype=np.int32)
         self.level_bitplanes: np.ndarray = np.array([], dtype=np.int32)
@@ -37,20 +51,35 @@ class MicoEncoder:
         self.bitstream = bitarray()
         self.cabac = CabacEncoder()
 
-    def encode(self, block: np.ndarray, lagrangian: float = 10_000) -> bitarray:
+    def encode(
+        self,
+        block: np.ndarray,
+        lagrangian: float = 10_000,
+        *,
+        level_bitplanes: np.ndarray | None = None,
+    ) -> bitarray:
         self.block = block
         self.lagrangian = lagrangian
 
-        optimizer = MicoOptimizer(block, lagrangian)
+        optimizer = MicoOptimizer(
+            block,
+            lagrangian,
+            bypass_signs=self.bypass_signs,
+            bypass_bitplanes=self.bypass_bitplanes,
+            cost_table=self.cost_table,
+            level_bitplanes=level_bitplanes,
+        )
         self.flags, self.estimated_rd = optimizer.optimize_tree()
 
         self.lower_bitplane = optimizer.lower_bitplane
         self.level_bitplanes = optimizer.level_bitplanes
         self.block_levels = optimizer.block_levels
+        self.tree = optimizer.tree
+        self.flat_block = optimizer.flat_block
 
         self.cabac.start(result=self.bitstream)
         self.encode_bitplane_sizes()
-        self.apply_encoding(self.flags.copy(), bigger_possible_slice(block.shape))
+        self.apply_encoding(self.flags.copy(), 0)
         return self.cabac.end(fill_to_byte=True)
 
     def encode_bitplane_sizes(self):
@@ -64,19 +93,16 @@ class MicoEncoder:
             last_size += delta
         self.prob_handler.clear()
 
-    def apply_encoding(self, flags: Flags, block_position: tuple[slice, ...]):
-        sub_block = self.block[block_position]
-        sub_levels = self.block_levels[block_position]
-        upper_bitplanes = self.level_bitplanes[sub_levels]
-
-        if np.all(upper_bitplanes <= self.lower_bitplane):
+    def apply_encoding(self, flags: Flags, node: int):
+        upper_bitplane = self.get_bitplane(node)
+        if upper_bitplane <= self.lower_bitplane:
             return
 
-        if np.all(upper_bitplanes <= 0):
+        if upper_bitplane <= 0:
             return
 
         flag = flags.popleft()
-        max_bp = self.get_bitplane(block_position)
+        max_bp = upper_bitplane
         model_split = self.prob_handler.split_model(max_bp)
         significant_block = self.prob_handler.significant_model(max_bp)
 
@@ -87,26 +113,31 @@ class MicoEncoder:
         elif flag == "F":
             self.cabac.encode_bit(1, model=significant_block)
             self.cabac.encode_bit(0, model=model_split)
-            for i, upper_bitplane in np.ndenumerate(upper_bitplanes):
-                value = sub_block[i].flatten()[0]
+            offsets = self.tree.offsets[node]
+            values = self.flat_block[offsets].tolist()
+            upper_bitplanes = self.level_bitplanes[
+                self.tree.flat_levels[offsets]
+            ].tolist()
+            for value, upper_bitplane in zip(values, upper_bitplanes):
                 self.encode_int(value, self.lower_bitplane, upper_bitplane, signed=True)
 
         elif flag == "S":
             self.cabac.encode_bit(1, model=significant_block)
             self.cabac.encode_bit(1, model=model_split)
-            for sub_pos in split_shape_in_half(block_position):
-                self.apply_encoding(flags, sub_pos)
+            for child in self.tree.children[node]:
+                self.apply_encoding(flags, child)
 
         elif flag == "z":
-            assert sub_block.size == 1
+            assert self.tree.sizes[node] == 1
             model = self.prob_handler.unit_model()
             self.cabac.encode_bit(0, model=model)
             return
 
         elif flag == "v":
-            assert sub_block.size == 1
-            value = sub_block.flatten()[0]
-            upper_bitplane = upper_bitplanes.flatten()[0]
+            assert self.tree.sizes[node] == 1
+            offset = self.tree.offsets[node][0]
+            value = self.flat_block[offset]
+            upper_bitplane = self.level_bitplanes[self.tree.flat_levels[offset]]
 
             model = self.prob_handler.unit_model()
             self.cabac.encode_bit(1, model=model)
@@ -119,19 +150,28 @@ class MicoEncoder:
         upper_bitplane: int,
         signed: bool,
     ):
-        absolute = np.abs(value)
-        for i in range(lower_bitplane, upper_bitplane):
+        absolute = int(np.abs(value))
+        bypass_bitplane = min(
+            max(self.bypass_bitplanes, lower_bitplane), upper_bitplane
+        )
+        if bypass_bitplane > lower_bitplane:
+            self.cabac.encode_bypass(
+                absolute >> lower_bitplane,
+                bypass_bitplane - lower_bitplane,
+            )
+
+        for i in range(bypass_bitplane, upper_bitplane):
             bit = ((1 << i) & absolute) != 0
             model = self.prob_handler.int_model(i)
             self.cabac.encode_bit(bit, model=model)
 
         mask = (1 << lower_bitplane) - 1
         if signed and (absolute & ~mask) != 0:
-            model = self.prob_handler.signal_model()
-            self.cabac.encode_bit(value < 0, model=model)
-
-    def get_bitplane(self, block_position: tuple[slice]):
-        level = get_level(block_position)
-        if level >= len(self.level_bitplanes):
-            return self.level_bitplanes[-1]
-        return self.level_bitplanes[level]
+            if self.bypass_signs:
+                self.cabac.encode_bypass(value < 0, 1)
+            else:
+                model = self.prob_handler.signal_model()
+                self.cabac.encode_bit(value < 0, model=model)
+
+    def get_bitplane(self, node: int):
+        return self.level_bitplanes[self.tree.bitplane_indexes[node]]
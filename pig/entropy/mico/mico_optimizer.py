@@ -5,84 +5,107 @@ from typing import Sequence
 import numpy as np
 
 from pig.metrics import RD, energy
-from pig.utils.block_utils import bigger_possible_slice, split_shape_in_half
+from pig.utils.bitplane_utils import bitplane_statistics
+from pig.utils.integral_image import IntegralImage
 
 from .mico_probability_handler import MicoProbabilityHandler
-from .utils import get_block_levels, get_level, max_level
+from .partition_tree import get_partition_tree
+from .utils import get_shape_levels, max_level
 
 Flags = deque[str]
 
 
 class MicoOptimizer:
-    def __init__(self, block: np.ndarray, lagrangian: int = 10_000):
+    def __init__(
+        self,
+        block: np.ndarray,
+        lagrangian: int = 10_000,
+        *,
+        bypass_signs: bool = False,
+        bypass_bitplanes: int = 0,
+        cost_table: bool = False,
+        level_bitplanes: np.ndarray | None = None,
+    ):
+        """
+        The level bitplanes can be given when they were already found,
+        like by a batched call of find_bitplane_per_level.
+        """
         self.block = block
         self.lagrangian = lagrangian
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
         self.prob_handler = MicoProbabilityHandler()
-
-        self.block_levels = get_block_levels(self.block)
-        self.level_bitplanes = MicoOptimizer.find_bitplane_per_level(self.block)
+        self.prob_handler.use_cost_table(cost_table)
+
+        self.tree = get_partition_tree(self.block.shape)
+        self.block_levels = self.tree.levels
+        self.flat_block = self.block.reshape(-1)
+        if level_bitplanes is None:
+            level_bitplanes = MicoOptimizer.find_bitplane_per_level(self.block)
+        self.level_bitplanes = level_bitplanes
         self.lower_bitplane = self.optimize_lower_bitplane()
 
-    def optimize_lower_bitplane(self) -> int:
-        lower_bitplane = 0
-        accumulated_rate = 0
-        best_cost = float("inf")
-
-        magnitudes = np.abs(self.block).flatten()
-        upper_bp = max(self.level_bitplanes)
-
-        for i in reversed(range(0, upper_bp)):
-            bit_position = 1 << i
-            lower_mask = bit_position - 1
-            non_zeroed = magnitudes >= bit_position
-
-            model = self.prob_handler.int_model(i)
-            bits_to_encode = magnitudes[non_zeroed] & bit_position != 0
-            for bit in bits_to_encode:
-                accumulated_rate += model.add_and_estimate_bit(bit)
+        # Statistics of any sub-block are found in constant time from summed-area tables
+        magnitudes = np.abs(self.block).astype(np.int64)
+        lower_mask = (1 << self.lower_bitplane) - 1
+        self.squares = IntegralImage(magnitudes * magnitudes)
+        self.truncated_squares = IntegralImage((magnitudes & lower_mask) ** 2)
+        self.nonzeros = IntegralImage(magnitudes != 0)
 
-            sign_rate = np.sum(non_zeroed, dtype=np.float64)
-            total_rate = accumulated_rate + sign_rate
-            rd = RD(total_rate, energy(magnitudes & lower_mask))
-
-            if rd.cost(self.lagrangian) < best_cost:
-                best_cost = rd.cost(self.lagrangian)
-                lower_bitplane = i
-
-        self.prob_handler.clear()
-        return lower_bitplane
-
-    def optimize_tree(self, block_position: tuple[slice, ...] | None = None) -> tuple[Flags, RD]:
-        if block_position is None:
-            block_position = bigger_possible_slice(self.block.shape)
-
-        sub_block = self.block[block_position]
-        sub_levels = self.block_levels[block_position]
-        upper_bitplanes = self.level_bitplanes[sub_levels]
-
-        if np.all(upper_bitplanes <= self.lower_bitplane) or np.all(upper_bitplanes <= 0):
+    def optimize_lower_bitplane(self) -> int:
+        upper_bp = int(max(self.level_bitplanes))
+        if upper_bp <= 0:
+            return 0
+
+        magnitudes = np.abs(self.block)
+        significant, ones, energies = bitplane_statistics(magnitudes, upper_bp)
+
+        rates = np.zeros(upper_bp, dtype=np.float64)
+        for i, (bits, number_of_ones) in enumerate(
+            zip(significant.tolist(), ones.tolist())
+        ):
+            if i < self.bypass_bitplanes:
+                rates[i] = bits
+            else:
+                model = self.prob_handler.int_model(i)
+                rates[i] = model.estimate_counts(bits - number_of_ones, number_of_ones)
+
+        # Bitplanes are coded from the top, so every candidate pays for the ones above it
+        accumulated_rates = np.cumsum(rates[::-1])[::-1]
+        costs = energies + self.lagrangian * (accumulated_rates + significant)
+
+        # On ties the higher bitplane wins, as it was the first one to be tested
+        return upper_bp - 1 - int(np.argmin(costs[::-1]))
+
+    def optimize_tree(self, node: int = 0) -> tuple[Flags, RD]:
+        tree = self.tree
+        block_position = tree.positions[node]
+
+        # Bitplanes never grow with the level, so the node level has the largest one
+        upper_bitplane = self.level_bitplanes[tree.bitplane_indexes[node]]
+        if upper_bitplane <= self.lower_bitplane or upper_bitplane <= 0:
             rd = RD(
                 rate=0,
-                distortion=energy(sub_block),
+                distortion=self.energy(block_position),
             )
             return (deque(), rd)
 
-        if sub_block.size == 1:
-            return self._estimate_unit_block(block_position)
+        if tree.sizes[node] == 1:
+            return self._estimate_unit_block(node)
 
-        if np.all(sub_block == 0):
-            return self._estimate_empty(block_position)
+        if self.nonzeros.sum(block_position) == 0:
+            return self._estimate_empty(node)
 
         self.prob_handler.push()
-        _, empty_rd = self._estimate_empty(block_position)
+        _, empty_rd = self._estimate_empty(node)
         self.prob_handler.pop()
 
         self.prob_handler.push()
-        _, full_rd = self._estimate_full(block_position)
+        _, full_rd = self._estimate_full(node)
         self.prob_handler.pop()
 
         self.prob_handler.push()
-        split_flags, split_rd = self._estimate_split(block_position)
+        split_flags, split_rd = self._estimate_split(node)
 
         split_cost = split_rd.cost(self.lagrangian)
         empty_cost = empty_rd.cost(self.lagrangian)
@@ -93,19 +116,16 @@ class MicoOptimizer:
 
         elif empty_cost < full_cost:
             self.prob_handler.pop()
-            return self._estimate_empty(block_position)
+            return self._estimate_empty(node)
 
         else:
-            return self._estimate_full(block_position)
-
-    def _estimate_unit_block(self, block_position: tuple[slice, ...]) -> tuple[Flags, RD]:
-        sub_block = self.block[block_position]
-        sub_levels = self.block_levels[block_position]
+            return self._estimate_full(node)
 
-        value = sub_block.flatten()[0]
-        level = sub_levels.flatten()[0]
+    def _estimate_unit_block(self, node: int) -> tuple[Flags, RD]:
+        offset = self.tree.offsets[node][0]
+        value = self.flat_block[offset]
         lower_bp = self.lower_bitplane
-        upper_bp = self.level_bitplanes[level]
+        upper_bp = self.level_bitplanes[self.tree.flat_levels[offset]]
 
         lower_mask = (1 << lower_bp) - 1
         upper_mask = ~lower_mask
@@ -124,46 +144,43 @@ class MicoOptimizer:
 
         return (flags, rd)
 
-    def _estimate_empty(self, block_position: tuple[slice, ...]) -> tuple[Flags, RD]:
+    def _estimate_empty(self, node: int) -> tuple[Flags, RD]:
         flags = deque("E")
-        sub_block = self.block[block_position]
-        max_bp = self.get_bitplane(block_position)
+        max_bp = self.get_bitplane(node)
 
         rd = RD()
         rd.rate += self.prob_handler.significant_model(max_bp).add_and_estimate_bit(0)
-        rd.distortion = energy(sub_block)
+        rd.distortion = self.energy(self.tree.positions[node])
         return flags, rd
 
-    def _estimate_full(
-        self,
-        block_position: tuple[slice, ...],
-    ) -> tuple[Flags, RD]:
+    def _estimate_full(self, node: int) -> tuple[Flags, RD]:
         flags = deque("F")
-        sub_block = self.block[block_position]
-        sub_levels = self.block_levels[block_position]
+        offsets = self.tree.offsets[node]
         lower_bp = self.lower_bitplane
-        max_bp = self.get_bitplane(block_position)
+        max_bp = self.get_bitplane(node)
 
         rd = RD()
         rd.rate += self.prob_handler.significant_model(max_bp).add_and_estimate_bit(1)
         rd.rate += self.prob_handler.split_model(max_bp).add_and_estimate_bit(0)
 
-        for level, value in zip(sub_levels.flatten(), sub_block.flatten()):
-            upper_bp = self.level_bitplanes[level]
-            rd += self._estimate_integer(value, lower_bp, upper_bp, signed=True)
+        upper_bps = self.level_bitplanes[self.tree.flat_levels[offsets]]
+        rd.rate += self._estimate_integers(
+            self.flat_block[offsets], lower_bp, upper_bps
+        )
+        rd.distortion = self.truncated_energy(self.tree.positions[node])
 
         return flags, rd
 
-    def _estimate_split(self, block_position: tuple[slice, ...]) -> tuple[Flags, RD]:
-        max_bp = self.get_bitplane(block_position)
+    def _estimate_split(self, node: int) -> tuple[Flags, RD]:
+        max_bp = self.get_bitplane(node)
 
         rd = RD()
         rd.rate += self.prob_handler.significant_model(max_bp).add_and_estimate_bit(1)
         rd.rate += self.prob_handler.split_model(max_bp).add_and_estimate_bit(1)
 
         flags = deque("S")
-        for sub_pos in split_shape_in_half(block_position):
-            current_flags, current_rd = self.optimize_tree(sub_pos)
+        for child in self.tree.children[node]:
+            current_flags, current_rd = self.optimize_tree(child)
             flags += current_flags
             rd += current_rd
 
@@ -184,41 +201,106 @@ class MicoOptimizer:
         rd.distortion = energy(np.abs(value) & lower_mask)
 
         quantized_value = np.abs(value) & upper_mask
-        for i in range(lower_bp, upper_bp):
+        bypass_bp = min(max(self.bypass_bitplanes, lower_bp), upper_bp)
+        rd.rate += max(bypass_bp - lower_bp, 0)
+
+        for i in range(bypass_bp, upper_bp):
             bit = ((1 << i) & quantized_value) != 0
             model = self.prob_handler.int_model(i)
             rd.rate += model.add_and_estimate_bit(bit)
 
         if signed and (quantized_value != 0):
-            model = self.prob_handler.signal_model()
-            rd.rate += model.add_and_estimate_bit(value < 0)
+            if self.bypass_signs:
+                rd.rate += 1
+            else:
+                model = self.prob_handler.signal_model()
+                rd.rate += model.add_and_estimate_bit(value < 0)
 
         return rd
 
-    def get_bitplane(self, block_position: tuple[slice]):
-        level = get_level(block_position)
-        if level >= len(self.level_bitplanes):
-            return self.level_bitplanes[-1]
-        return self.level_bitplanes[level]
+    def _estimate_integers(
+        self,
+        values: np.ndarray,
+        lower_bp: int,
+        upper_bps: np.ndarray,
+    ) -> float:
+        """
+        Rate of _estimate_integer for many signed values at once.
+        As the cost of a frequentist model only depends on how many zeros and ones it codes,
+        each bitplane is estimated once from its histogram.
+        """
+        lower_mask = (1 << lower_bp) - 1
+        upper_mask = ~lower_mask
+        quantized_values = np.abs(values) & upper_mask
+
+        rate = 0
+
+        bitplanes = np.arange(lower_bp, max(np.max(upper_bps, initial=0), lower_bp))
+        coded = upper_bps[:, np.newaxis] > bitplanes
+        ones = coded & ((quantized_values[:, np.newaxis] >> bitplanes) & 1 != 0)
+        number_of_bits = np.count_nonzero(coded, axis=0).tolist()
+        number_of_ones = np.count_nonzero(ones, axis=0).tolist()
+
+        for i, bits, number_of_ones_i in zip(
+            bitplanes.tolist(), number_of_bits, number_of_ones
+        ):
+            if i < self.bypass_bitplanes:
+                rate += bits
+            else:
+                model = self.prob_handler.int_model(i)
+                rate += model.add_and_estimate_counts(
+                    bits - number_of_ones_i, number_of_ones_i
+                )
+
+        signals = quantized_values != 0
+        number_of_signals = int(np.count_nonzero(signals))
+        negatives = int(np.count_nonzero(signals & (values < 0)))
+        if self.bypass_signs:
+            rate += number_of_signals
+        else:
+            model = self.prob_handler.signal_model()
+            rate += model.add_and_estimate_counts(
+                number_of_signals - negatives, negatives
+            )
+
+        return rate
+
+    def energy(self, block_position: tuple[slice, ...]) -> float:
+        return float(self.squares.sum(block_position))
+
+    def truncated_energy(self, block_position: tuple[slice, ...]) -> float:
+        """
+        Energy lost in the block when the bits below the lower bitplane are discarded.
+        """
+        return float(self.truncated_squares.sum(block_position))
+
+    def get_bitplane(self, node: int):
+        return self.level_bitplanes[self.tree.bitplane_indexes[node]]
 
     @staticmethod
-    def find_bitplane_per_level(block: np.ndarray) -> np.ndarray:
+    def find_bitplane_per_level(
+        block: np.ndarray, *, stacked: bool = False
+    ) -> np.ndarray:
         """
         Find the maximum bitplane by level of the block.
-        The code is a bit dumb, but it works and is fast enough.
+        If stacked, the first axis indexes equally sized blocks and
+        the bitplanes of all of them are found at once, one row per block.
         """
 
-        total_levels = max_level(block.shape)
-        bitplane_sizes = np.array([0 for _ in range(total_levels)], dtype=np.int32)
+        shape = block.shape[1:] if stacked else block.shape
+        blocks = block.reshape((-1, *shape))
+        total_levels = max_level(shape)
+
+        levels = get_shape_levels(shape).reshape(-1)
+        _, bit_lengths = np.frexp(np.abs(blocks.reshape(len(blocks), -1)))
 
-        for position, value in np.ndenumerate(block):
-            level = min(get_level(position), total_levels - 1)
-            max_bp = int(value).bit_length()
-            bitplane_sizes[level] = max(bitplane_sizes[level], max_bp)
+        bitplane_sizes = np.zeros((len(blocks), total_levels), dtype=np.int32)
+        block_indexes = np.arange(len(blocks))[:, np.newaxis]
+        np.maximum.at(bitplane_sizes, (block_indexes, levels), bit_lengths)
 
         # Each level is assumed to have equal or smaller bitplane size
-        bitplane_sizes = np.maximum.accumulate(bitplane_sizes[::-1])[::-1]
-        return bitplane_sizes
+        bitplane_sizes = np.maximum.accumulate(bitplane_sizes[:, ::-1], axis=1)[:, ::-1]
+        return bitplane_sizes if stacked else bitplane_sizes[0]
 
     @staticmethod
     def find_max_bitplane(block: np.ndarray):
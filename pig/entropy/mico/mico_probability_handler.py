@@ -1,48 +1,50 @@
-from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+from pig.entropy.probability_model.model_bank import BankedPM, ModelBank
 
 
 class MicoProbabilityHandler:
     def __init__(self):
-        self._bitplane_sizes_model = FrequentistPM()
-        self._signals_probability_model = FrequentistPM()
-        self._unit_flags_model = FrequentistPM()
+        self._bank = ModelBank(3 + 32 * 3)
+        self._bitplane_sizes_model = self._bank.model(0)
+        self._signals_probability_model = self._bank.model(1)
+        self._unit_flags_model = self._bank.model(2)
 
-        self._integer_probability_models = [FrequentistPM() for _ in range(32)]
-        self._split_flags_models = [FrequentistPM() for _ in range(32)]
-        self._significant_flags_models = [FrequentistPM() for _ in range(32)]
+        self._integer_probability_models = self._bank.models[3 : 3 + 32]
+        self._split_flags_models = self._bank.models[3 + 32 : 3 + 32 * 2]
+        self._significant_flags_models = self._bank.models[3 + 32 * 2 :]
 
-    def signal_model(self) -> FrequentistPM:
+    def signal_model(self) -> BankedPM:
         return self._signals_probability_model
 
-    def int_model(self, bitplane: int) -> FrequentistPM:
+    def int_model(self, bitplane: int) -> BankedPM:
         assert 0 <= bitplane < 32
         return self._integer_probability_models[bitplane]
 
-    def split_model(self, bitplane: int) -> FrequentistPM:
+    def split_model(self, bitplane: int) -> BankedPM:
         assert 0 <= bitplane < 32
         return self._split_flags_models[bitplane]
 
-    def significant_model(self, bitplane: int) -> FrequentistPM:
+    def significant_model(self, bitplane: int) -> BankedPM:
         assert 0 <= bitplane < 32
         return self._significant_flags_models[bitplane]
 
-    def unit_model(self) -> FrequentistPM:
+    def unit_model(self) -> BankedPM:
         return self._unit_flags_model
 
-    def bitplanes_model(self) -> FrequentistPM:
+    def bitplanes_model(self) -> BankedPM:
         return self._bitplane_sizes_model
 
     def push(self):
-        for model in self._all_models():
-            model.push()
+        self._bank.push()
 
     def pop(self):
+        self._bank.pop()
+
+    def use_cost_table(self, enabled: bool = True):
         for model in self._all_models():
-            model.pop()
+            model.cost_table = enabled
 
     def clear(self):
-        for model in self._all_models():
-            model.clear()
+        self._bank.clear()
 
     def estimate_rate(self) -> float:
         rate = 0
@@ -52,16 +54,10 @@ class MicoProbabilityHandler:
 
     def copy(self):
         other = MicoProbabilityHandler()
+        other._bank.copy_from(self._bank)
         for model, other_model in zip(self._all_models(), other._all_models()):
-            other_model.set_values(model.get_values())
+            other_model.cost_table = model.cost_table
         return other
 
-    def _all_models(self) -> tuple[FrequentistPM, ...]:
-        return (
-            self._bitplane_sizes_model,
-            self._signals_probability_model,
-            self._unit_flags_model,
-            *self._integer_probability_models,
-            *self._split_flags_models,
-            *self._significant_flags_models,
-        )
+    def _all_models(self) -> list[BankedPM]:
+        return self._bank.models
@@ -0,0 +1,77 @@
+from functools import lru_cache
+
+import numpy as np
+
+from pig.utils.block_utils import bigger_possible_slice, split_shape_in_half
+
+from .utils import get_level, get_shape_levels, max_level
+
+
+class PartitionTree:
+    """
+    All sub-blocks that MICO may visit when splitting a block of a given shape.
+    Nodes are integer ids, the root being 0, and everything the optimizer,
+    encoder and decoder need from a node position is computed once here.
+
+    Empty sub-blocks, produced when a dimension of size 1 is split, never code
+    anything and are left out of the tree.
+    """
+
+    def __init__(self, shape: tuple[int, ...]):
+        self.shape = tuple(shape)
+        self.total_levels = max_level(self.shape)
+
+        levels = get_shape_levels(self.shape)
+        levels.flags.writeable = False
+        self.levels = levels
+        self.flat_levels = levels.reshape(-1)
+
+        positions = []
+        children = []
+        node_levels = []
+        offsets = []
+
+        flat_indices = np.arange(levels.size).reshape(self.shape)
+        stack = [(bigger_possible_slice(self.shape), None)]
+
+        while stack:
+            position, parent = stack.pop()
+            node = len(positions)
+            if parent is not None:
+                children[parent].append(node)
+
+            node_offsets = flat_indices[position].reshape(-1)
+            node_offsets.flags.writeable = False
+
+            positions.append(position)
+            children.append([])
+            node_levels.append(get_level(position))
+            offsets.append(node_offsets)
+
+            if node_offsets.size > 1:
+                sub_positions = [
+                    sub_position
+                    for sub_position in split_shape_in_half(position)
+                    if all(s.start < s.stop for s in sub_position)
+                ]
+                # Reversed, so nodes are numbered in the order they are visited
+                stack.extend(
+                    (sub_position, node) for sub_position in reversed(sub_positions)
+                )
+
+        self.positions = tuple(positions)
+        self.children = tuple(tuple(node_children) for node_children in children)
+        self.node_levels = tuple(node_levels)
+        self.bitplane_indexes = tuple(
+            min(level, self.total_levels - 1) for level in node_levels
+        )
+        self.sizes = tuple(node_offsets.size for node_offsets in offsets)
+        self.offsets = tuple(offsets)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+@lru_cache(maxsize=32)
+def get_partition_tree(shape: tuple[int, ...]) -> PartitionTree:
+    return PartitionTree(shape)
@@ -27,10 +27,8 @@ def get_shape_levels(shape: tuple[int, ...]) -> np.ndarray:
     3, 3, 3, 3, 4
     """
 
-    blocks_level = np.zeros(shape, dtype=np.int32)
     total_levels = max_level(shape)
-    for position in np.ndindex(*shape):
-        blocks_level[position] = get_level(position)
+    blocks_level = np.maximum.reduce(np.indices(shape, dtype=np.int32))
     return blocks_level.clip(0, total_levels - 1)
 
 
@@ -8,7 +8,10 @@ from .mule_probability_handler import MuleProbabilityHandler
 
 
 class MuleDecoder:
-    def __init__(self):
+    def __init__(self, *, bypass_signs: bool = False, bypass_bitplanes: int = 0):
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
+
         self.lower_bitplane = 0
         self.upper_bitplane = 32
 
@@ -63,12 +66,24 @@ class MuleDecoder:
     ) -> int:
         value = 0
 
-        for i in range(lower_bitplane, upper_bitplane):
+        bypass_bitplane = min(
+            max(self.bypass_bitplanes, lower_bitplane), upper_bitplane
+        )
+        if bypass_bitplane > lower_bitplane:
+            value = (
+                self.cabac.decode_bypass(bypass_bitplane - lower_bitplane)
+                << lower_bitplane
+            )
+
+        for i in range(bypass_bitplane, upper_bitplane):
             bit = self.cabac.decode_bit(model=self.prob_handler.int_model(i))
             value |= bit << i
 
         if signed and value != 0:
-            signal = self.cabac.decode_bit(model=self.prob_handler.signal_model())
+            if self.bypass_signs:
+                signal = self.cabac.decode_bypass(1)
+            else:
+                signal = self.cabac.decode_bit(model=self.prob_handler.signal_model())
             if signal:
                 value = -value
 
@@ -5,6 +5,7 @@ from bitarray import bitarray
 
 from pig.entropy import CabacEncoder, FrequentistPM
 from pig.metrics import RD, energy
+from pig.utils.block_pyramid import BlockPyramid
 from pig.utils.block_utils import split_blocks_in_half
 
 from .mule_optimizer import MuleOptimizer
@@ -14,7 +15,22 @@ Flags = deque[str]
 
 
 class MuleEncoder:
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        bypass_signs: bool = False,
+        bypass_bitplanes: int = 0,
+        cost_table: bool = False,
+    ):
+        """
+        Signs (if bypass_signs) and bitplanes below bypass_bitplanes are coded
+        as equiprobable bins, skipping the probability models.
+        With cost_table the optimizer estimates the rate of single bits from
+        precomputed tables, batches of bits are always estimated exactly.
+        """
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
+
         self.flags = ""
         self.estimated_rd = RD()
 
@@ -22,7 +38,11 @@ class MuleEncoder:
         self.upper_bitplane = 32
         self.lagrangian = 10_000
 
-        self.optimizer = MuleOptimizer()
+        self.optimizer = MuleOptimizer(
+            bypass_signs=bypass_signs,
+            bypass_bitplanes=bypass_bitplanes,
+            cost_table=cost_table,
+        )
         self.prob_handler = MuleProbabilityHandler()
         self.bitstream = bitarray()
         self.cabac = CabacEncoder()
@@ -37,8 +57,9 @@ class MuleEncoder:
         self.lagrangian = lagrangian
         self.optimizer.lagrangian = self.lagrangian
 
+        pyramid = BlockPyramid(block)
         if upper_bitplane is None:
-            self.upper_bitplane = self.optimizer.find_max_bitplane(block)
+            self.upper_bitplane = pyramid.max_bitplane()
         else:
             self.upper_bitplane = upper_bitplane
 
@@ -51,8 +72,11 @@ class MuleEncoder:
             block,
             self.lower_bitplane,
             self.upper_bitplane,
+            pyramid=pyramid,
         )
 
+        self.prob_handler.clear()
+        self.bitstream = bitarray()
         self.cabac.start(result=self.bitstream)
         self.encode_int(self.lower_bitplane, 0, 5, signed=False)
         self.apply_encoding(self.flags.copy(), block, self.upper_bitplane)
@@ -104,13 +128,25 @@ class MuleEncoder:
         upper_bitplane: int,
         signed: bool,
     ):
-        absolute = np.abs(value)
-        for i in range(lower_bitplane, upper_bitplane):
+        absolute = int(np.abs(value))
+        bypass_bitplane = min(
+            max(self.bypass_bitplanes, lower_bitplane), upper_bitplane
+        )
+        if bypass_bitplane > lower_bitplane:
+            self.cabac.encode_bypass(
+                absolute >> lower_bitplane,
+                bypass_bitplane - lower_bitplane,
+            )
+
+        for i in range(bypass_bitplane, upper_bitplane):
             bit = ((1 << i) & absolute) != 0
             model = self.prob_handler.int_model(i)
             self.cabac.encode_bit(bit, model=model)
 
         mask = (1 << lower_bitplane) - 1
         if signed and (absolute & ~mask) != 0:
-            model = self.prob_handler.signal_model()
-            self.cabac.encode_bit(value < 0, model=model)
+            if self.bypass_signs:
+                self.cabac.encode_bypass(value < 0, 1)
+            else:
+                model = self.prob_handler.signal_model()
+                self.cabac.encode_bit(value < 0, model=model)
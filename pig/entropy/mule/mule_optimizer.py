@@ -6,7 +6,8 @@ from bitarray import bitarray
 
 from pig.entropy import CabacEncoder, FrequentistPM
 from pig.metrics import RD, energy
-from pig.utils.block_utils import split_blocks_in_half
+from pig.utils.bitplane_utils import bitplane_statistics
+from pig.utils.block_pyramid import BlockPyramid, Node
 
 from .mule_probability_handler import MuleProbabilityHandler
 
@@ -14,52 +15,81 @@ Flags = deque[str]
 
 
 class MuleOptimizer:
-    def __init__(self, lagrangian: int = 10_000):
+    def __init__(
+        self,
+        lagrangian: int = 10_000,
+        *,
+        bypass_signs: bool = False,
+        bypass_bitplanes: int = 0,
+        cost_table: bool = False,
+    ):
         self.lagrangian = lagrangian
+        self.bypass_signs = bypass_signs
+        self.bypass_bitplanes = bypass_bitplanes
         self.prob_handler = MuleProbabilityHandler()
+        self.prob_handler.use_cost_table(cost_table)
 
     def optimize_lower_bitplane(self, block: np.ndarray, upper_bp: int) -> int:
-        lower_bitplane = 0
-        accumulated_rate = 0
-        best_cost = float("inf")
-        magnitudes = np.abs(block.flatten())
-
-        for i in reversed(range(0, upper_bp)):
-            bit_position = 1 << i
-            mask = bit_position - 1
-            model = self.prob_handler.int_model(i)
-            non_zeroed = magnitudes > bit_position
+        # Each block starts from fresh models, as the optimizer is reused by MuleEncoder
+        self.prob_handler.clear()
 
-            bits_to_encode = magnitudes[non_zeroed] & bit_position != 0
-            for bit in bits_to_encode:
-                accumulated_rate += model.add_and_estimate_bit(bit)
+        if upper_bp <= 0:
+            return 0
 
-            sign_rate = np.sum(non_zeroed)
-            total_rate = accumulated_rate + sign_rate
-            rd = RD(total_rate, energy(magnitudes & mask))
+        magnitudes = np.abs(block)
+        significant, ones, energies = bitplane_statistics(
+            magnitudes, upper_bp, strict=True
+        )
 
-            if rd.cost(self.lagrangian) < best_cost:
-                best_cost = rd.cost(self.lagrangian)
-                lower_bitplane = i
+        rates = np.zeros(upper_bp, dtype=np.float64)
+        for i, (bits, number_of_ones) in enumerate(
+            zip(significant.tolist(), ones.tolist())
+        ):
+            if i < self.bypass_bitplanes:
+                rates[i] = bits
+            else:
+                model = self.prob_handler.int_model(i)
+                rates[i] = model.estimate_counts(bits - number_of_ones, number_of_ones)
 
-        self.prob_handler.clear()
-        return lower_bitplane
+        # Bitplanes are coded from the top, so every candidate pays for the ones above it
+        accumulated_rates = np.cumsum(rates[::-1])[::-1]
+        costs = energies + self.lagrangian * (accumulated_rates + significant)
+
+        # On ties the higher bitplane wins, as it was the first one to be tested
+        return upper_bp - 1 - int(np.argmin(costs[::-1]))
 
     def optimize_tree(
         self,
         block: np.ndarray,
         lower_bp: int,
         upper_bp: int,
+        *,
+        pyramid: BlockPyramid | None = None,
+    ) -> tuple[Flags, RD]:
+        """
+        The energies and bitplanes of the sub-blocks are queried from a BlockPyramid,
+        that can be passed when it was already built for this block.
+        """
+        if pyramid is None:
+            pyramid = BlockPyramid(block)
+        return self._optimize_node(pyramid, pyramid.root, lower_bp, upper_bp)
+
+    def _optimize_node(
+        self,
+        pyramid: BlockPyramid,
+        node: Node,
+        lower_bp: int,
+        upper_bp: int,
     ) -> tuple[Flags, RD]:
         if upper_bp < lower_bp or upper_bp <= 0:
             rd = RD(
                 rate=0,
-                distortion=energy(block),
+                distortion=pyramid.energy(node),
             )
             return (deque(), rd)
 
-        if block.size == 1:
-            value = block.flatten()[0]
+        if pyramid.size(node) == 1:
+            value = pyramid.value(node)
             rd = self._estimate_integer(
                 value,
                 lower_bp,
@@ -69,16 +99,18 @@ class MuleOptimizer:
             return (deque(), rd)
 
         self.prob_handler.push()
-        should_lower_bitplane = self.is_bitplane_zero(block, upper_bp)
+        should_lower_bitplane = pyramid.is_bitplane_zero(node, upper_bp)
         if should_lower_bitplane:
             segmentation_flags, segmentation_rd = self._estimate_lower_bp(
-                block,
+                pyramid,
+                node,
                 lower_bp,
                 upper_bp,
             )
         else:
             segmentation_flags, segmentation_rd = self._estimate_split(
-                block,
+                pyramid,
+                node,
                 lower_bp,
                 upper_bp,
             )
@@ -86,14 +118,14 @@ class MuleOptimizer:
         model = self.prob_handler.flag_model(upper_bp, 0)
         zero_rd = RD(
             rate=model.estimate_bit(1),
-            distortion=energy(block),
+            distortion=pyramid.energy(node),
         )
 
         if segmentation_rd.cost(self.lagrangian) < zero_rd.cost(self.lagrangian):
             return segmentation_flags, segmentation_rd
         else:
             self.prob_handler.pop()
-            return self._estimate_zero(block, upper_bp)
+            return self._estimate_zero(pyramid, node, upper_bp)
 
     def _estimate_integer(
         self,
@@ -111,20 +143,29 @@ class MuleOptimizer:
         )
 
         masked_value = np.abs(value) & upper_mask
-        for i in range(lower_bp, upper_bp):
+        bypass_bp = min(max(self.bypass_bitplanes, lower_bp), upper_bp)
+        rd.rate += max(bypass_bp - lower_bp, 0)
+
+        # Each bitplane of a leaf has its own model and a single bit, so there is
+        # nothing to batch: estimate_counts(1 - bit, bit) is the same lookup
+        for i in range(bypass_bp, upper_bp):
             bit = ((1 << i) & masked_value) != 0
             model = self.prob_handler.int_model(i)
             rd.rate += model.add_and_estimate_bit(bit)
 
         if signed and (masked_value != 0):
-            model = self.prob_handler.signal_model()
-            rd.rate += model.add_and_estimate_bit(value < 0)
+            if self.bypass_signs:
+                rd.rate += 1
+            else:
+                model = self.prob_handler.signal_model()
+                rd.rate += model.add_and_estimate_bit(value < 0)
 
         return rd
 
     def _estimate_lower_bp(
         self,
-        block: np.ndarray,
+        pyramid: BlockPyramid,
+        node: Node,
         lower_bp: int,
         upper_bp: int,
     ) -> tuple[Flags, RD]:
@@ -137,8 +178,9 @@ class MuleOptimizer:
         rd.rate += model_0.add_and_estimate_bit(0)
         rd.rate += model_1.add_and_estimate_bit(0)
 
-        current_flags, current_rd = self.optimize_tree(
-            block,
+        current_flags, current_rd = self._optimize_node(
+            pyramid,
+            node,
             lower_bp,
             upper_bp - 1,
         )
@@ -150,7 +192,8 @@ class MuleOptimizer:
 
     def _estimate_split(
         self,
-        block: np.ndarray,
+        pyramid: BlockPyramid,
+        node: Node,
         lower_bp: int,
         upper_bp: int,
     ) -> tuple[Flags, RD]:
@@ -163,9 +206,10 @@ class MuleOptimizer:
         rd.rate += model_0.add_and_estimate_bit(0)
         rd.rate += model_1.add_and_estimate_bit(1)
 
-        for sub_block in split_blocks_in_half(block):
-            current_flags, current_rd = self.optimize_tree(
-                sub_block,
+        for child in pyramid.children(node):
+            current_flags, current_rd = self._optimize_node(
+                pyramid,
+                child,
                 lower_bp,
                 upper_bp,
             )
@@ -176,14 +220,15 @@ class MuleOptimizer:
 
     def _estimate_zero(
         self,
-        block: np.ndarray,
+        pyramid: BlockPyramid,
+        node: Node,
         upper_bp: int,
     ) -> tuple[Flags, RD]:
         flags = deque("Z")
         model = self.prob_handler.flag_model(upper_bp, 0)
         rd = RD(
             rate=model.add_and_estimate_bit(1),
-            distortion=energy(block),
+            distortion=pyramid.energy(node),
         )
         return flags, rd
 
@@ -1,45 +1,44 @@
-from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+from pig.entropy.probability_model.model_bank import BankedPM, ModelBank
 
 
 class MuleProbabilityHandler:
     def __init__(self):
-        self._signals_probability_model = FrequentistPM()
-        self._flag_probability_models = [FrequentistPM() for _ in range(32 * 2)]
-        self._integer_probability_models = [FrequentistPM() for _ in range(32)]
+        self._bank = ModelBank(1 + 32 * 2 + 32)
+        self._signals_probability_model = self._bank.model(0)
+        self._flag_probability_models = self._bank.models[1 : 1 + 32 * 2]
+        self._integer_probability_models = self._bank.models[1 + 32 * 2 :]
 
-    def signal_model(self) -> FrequentistPM:
+    def signal_model(self) -> BankedPM:
         return self._signals_probability_model
 
-    def int_model(self, bitplane: int) -> FrequentistPM:
+    def int_model(self, bitplane: int) -> BankedPM:
         assert 0 <= bitplane < 32
         return self._integer_probability_models[bitplane]
 
-    def flag_model(self, bitplane: int, position: int) -> FrequentistPM:
+    def flag_model(self, bitplane: int, position: int) -> BankedPM:
         assert position in (0, 1)
         assert 0 <= bitplane < 32
         return self._flag_probability_models[bitplane * 2 + position]
 
     def push(self):
-        for model in self._all_models():
-            model.push()
+        self._bank.push()
 
     def pop(self):
+        self._bank.pop()
+
+    def use_cost_table(self, enabled: bool = True):
         for model in self._all_models():
-            model.pop()
+            model.cost_table = enabled
 
     def clear(self):
-        for model in self._all_models():
-            model.clear()
+        self._bank.clear()
 
     def copy(self):
         other = MuleProbabilityHandler()
+        other._bank.copy_from(self._bank)
         for model, other_model in zip(self._all_models(), other._all_models()):
-            other_model.set_values(model.get_values())
+            other_model.cost_table = model.cost_table
         return other
 
     def _all_models(self):
-        return (
-            self._signals_probability_model,
-            *self._flag_probability_models,
-            *self._integer_probability_models,
-        )
+        return self._bank.models
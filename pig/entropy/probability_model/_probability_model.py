@@ -3,6 +3,8 @@ from typing import Literal
 
 import numpy as np
 
+from .bit_cost import probability_cost
+
 
 class ProbabilityModel(ABC):
     def __init__(self, frequency_of_zeros: int = 1, frequency_of_ones: int = 1):
@@ -10,6 +12,9 @@ class ProbabilityModel(ABC):
         self._frequency_of_ones = frequency_of_ones
         self._stack = list()
 
+        # Estimate costs from precomputed tables instead of computing log2
+        self.cost_table = False
+
     def clear(self):
         self._frequency_of_ones = 1
         self._frequency_of_zeros = 1
@@ -48,10 +53,44 @@ class ProbabilityModel(ABC):
         self.add_bit(bit)
         return estimative
 
+    def add_counts(self, number_of_zeros: int, number_of_ones: int) -> None:
+        for _ in range(number_of_zeros):
+            self.add_bit(0)
+        for _ in range(number_of_ones):
+            self.add_bit(1)
+
+    def add_and_estimate_counts(
+        self, number_of_zeros: int, number_of_ones: int
+    ) -> float:
+        estimative = self.estimate_counts(number_of_zeros, number_of_ones)
+        self.add_counts(number_of_zeros, number_of_ones)
+        return estimative
+
+    def estimate_counts(self, number_of_zeros: int, number_of_ones: int) -> float:
+        """
+        Adaptive cost of coding number_of_zeros zeros followed by number_of_ones ones.
+        """
+        values = self.get_values()
+        estimative = 0
+        for _ in range(number_of_zeros):
+            estimative += self.add_and_estimate_bit(0)
+        for _ in range(number_of_ones):
+            estimative += self.add_and_estimate_bit(1)
+        self.set_values(values)
+        return estimative
+
     def estimate_bit(self, bit: bool) -> float:
         prob = self.probability(1 if bit else 0)
+        if self.cost_table:
+            return probability_cost(prob)
         return -np.log2(prob)
 
+    def split_range(self, current_range: int) -> int:
+        """
+        Part of the current range (high - low) of an arithmetic coder assigned to the bit 0.
+        """
+        return int(current_range * self.probability(0))
+
     @abstractmethod
     def probability(self, bit: bool | Literal[0, 1]) -> float: ...
 
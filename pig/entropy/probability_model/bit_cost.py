@@ -0,0 +1,32 @@
+"""
+Precomputed costs, in bits, of coding a bin with a given probability.
+
+Probabilities are quantized with COST_PROBABILITY_BITS bits, taking the
+center of each quantization step, and costs are rounded to COST_FRACTION_BITS
+fractional bits. For a probability p >= 2^-16 the tabulated cost differs from
+-log2(p) by at most 2^-16 / (p * ln 2) + 2^-17 bits.
+"""
+
+import numpy as np
+
+COST_PROBABILITY_BITS = 16
+COST_FRACTION_BITS = 16
+
+
+def _tabulate_costs() -> list[float]:
+    steps = 1 << COST_PROBABILITY_BITS
+    centers = (np.arange(steps + 1, dtype=np.float64) + 0.5) / steps
+    costs = -np.log2(np.minimum(centers, 1.0))
+    scale = 1 << COST_FRACTION_BITS
+    return (np.rint(costs * scale) / scale).tolist()
+
+
+BIT_COSTS = _tabulate_costs()
+
+
+def frequency_cost(frequency: int, total: int) -> float:
+    return BIT_COSTS[(frequency << COST_PROBABILITY_BITS) // total]
+
+
+def probability_cost(probability: float) -> float:
+    return BIT_COSTS[int(probability * (1 << COST_PROBABILITY_BITS))]
@@ -1,6 +1,31 @@
+from math import lgamma, log
 from typing import Literal
 
 from ._probability_model import ProbabilityModel
+from .bit_cost import frequency_cost
+
+
+def adaptive_cost(
+    frequency_of_zeros: int,
+    frequency_of_ones: int,
+    number_of_zeros: int,
+    number_of_ones: int,
+) -> float:
+    """
+    Bits needed to code number_of_zeros zeros and number_of_ones ones with an adaptive
+    frequentist model that starts from the given frequencies. The result does not
+    depend on the order of the bits, so it has a closed form with log-gamma functions.
+    """
+    total = frequency_of_zeros + frequency_of_ones
+    log_probability = (
+        lgamma(frequency_of_zeros + number_of_zeros)
+        - lgamma(frequency_of_zeros)
+        + lgamma(frequency_of_ones + number_of_ones)
+        - lgamma(frequency_of_ones)
+        - lgamma(total + number_of_zeros + number_of_ones)
+        + lgamma(total)
+    )
+    return -log_probability / log(2)
 
 
 class FrequentistPM(ProbabilityModel):
@@ -16,6 +41,30 @@ class FrequentistPM(ProbabilityModel):
         else:
             return self.frequency(0) / self.total_bits()
 
+    def estimate_bit(self, bit: bool) -> float:
+        if self.cost_table:
+            frequency = self._frequency_of_ones if bit else self._frequency_of_zeros
+            return frequency_cost(
+                frequency, self._frequency_of_zeros + self._frequency_of_ones
+            )
+        return super().estimate_bit(bit)
+
+    def add_counts(self, number_of_zeros: int, number_of_ones: int) -> None:
+        self._frequency_of_zeros += number_of_zeros
+        self._frequency_of_ones += number_of_ones
+
+    def estimate_counts(self, number_of_zeros: int, number_of_ones: int) -> float:
+        """
+        Always exact, even with cost_table. The closed form costs the same for any
+        number of bits, while the table would need a lookup per bit.
+        """
+        return adaptive_cost(
+            self._frequency_of_zeros,
+            self._frequency_of_ones,
+            number_of_zeros,
+            number_of_ones,
+        )
+
     def set_values(self, values):
         self._frequency_of_zeros, self._frequency_of_ones = values
 
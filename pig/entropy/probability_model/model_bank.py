@@ -0,0 +1,139 @@
+from array import array
+from typing import Literal
+
+import numpy as np
+
+from .bit_cost import frequency_cost
+from .frequentist_pm import FrequentistPM, adaptive_cost
+
+# Journal entries pack the counter index with the amount it was incremented
+JOURNAL_INDEX_BITS = 24
+JOURNAL_INDEX_MASK = (1 << JOURNAL_INDEX_BITS) - 1
+
+
+class ModelBank:
+    """
+    Frequentist contexts stored as a struct of arrays.
+
+    The frequencies of every context live in a single buffer and each context
+    is addressed by an integer id. Checkpoints are journaled: while there is
+    an open checkpoint every frequency increment is logged, and rolling back
+    replays the log backwards. So push/pop costs scale with the number of
+    bins added in between, not with the number of contexts.
+
+    Only add_bit and add_counts are journaled, writes through set_values or
+    clear of a single context are not undone by pop.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = array("q", [1]) * (2 * size)
+        self.journal: list[int] = list()
+        self.checkpoints: list[int] = list()
+        self.models = [BankedPM(self, context) for context in range(size)]
+
+    def model(self, context: int) -> "BankedPM":
+        return self.models[context]
+
+    def push(self):
+        self.checkpoints.append(len(self.journal))
+
+    def pop(self):
+        checkpoint = self.checkpoints.pop()
+        counts = self.counts
+        journal = self.journal
+
+        for i in range(checkpoint, len(journal)):
+            entry = journal[i]
+            counts[entry & JOURNAL_INDEX_MASK] -= entry >> JOURNAL_INDEX_BITS
+        del journal[checkpoint:]
+
+    def clear(self):
+        self.counts[:] = array("q", [1]) * (2 * self.size)
+        self.journal.clear()
+        self.checkpoints.clear()
+
+    def copy_from(self, other: "ModelBank"):
+        self.counts[:] = other.counts
+
+
+class BankedPM(FrequentistPM):
+    """
+    Frequentist model whose frequencies are stored in a ModelBank.
+    """
+
+    def __init__(self, bank: ModelBank, context: int):
+        super().__init__()
+        self._counts = bank.counts
+        self._journal = bank.journal
+        self._checkpoints = bank.checkpoints
+        self._zeros_index = 2 * context
+        self._ones_index = 2 * context + 1
+        self._zeros_entry = self._zeros_index | (1 << JOURNAL_INDEX_BITS)
+        self._ones_entry = self._ones_index | (1 << JOURNAL_INDEX_BITS)
+
+    def add_bit(self, bit: bool | Literal[0, 1]) -> None:
+        if bit:
+            self._counts[self._ones_index] += 1
+            if self._checkpoints:
+                self._journal.append(self._ones_entry)
+        else:
+            self._counts[self._zeros_index] += 1
+            if self._checkpoints:
+                self._journal.append(self._zeros_entry)
+
+    def add_counts(self, number_of_zeros: int, number_of_ones: int) -> None:
+        self._counts[self._zeros_index] += number_of_zeros
+        self._counts[self._ones_index] += number_of_ones
+
+        if self._checkpoints:
+            self._journal.append(
+                self._zeros_index | (number_of_zeros << JOURNAL_INDEX_BITS)
+            )
+            self._journal.append(
+                self._ones_index | (number_of_ones << JOURNAL_INDEX_BITS)
+            )
+
+    def estimate_counts(self, number_of_zeros: int, number_of_ones: int) -> float:
+        """
+        Always exact, even with cost_table. The closed form costs the same for any
+        number of bits, while the table would need a lookup per bit.
+        """
+        return adaptive_cost(
+            self._counts[self._zeros_index],
+            self._counts[self._ones_index],
+            number_of_zeros,
+            number_of_ones,
+        )
+
+    def frequency(self, bit: bool | Literal[0, 1]) -> int:
+        return self._counts[self._ones_index if bit else self._zeros_index]
+
+    def total_bits(self) -> int:
+        return self._counts[self._zeros_index] + self._counts[self._ones_index]
+
+    def clear(self):
+        self._counts[self._zeros_index] = 1
+        self._counts[self._ones_index] = 1
+        self._stack.clear()
+
+    def split_range(self, current_range: int) -> int:
+        zeros = self._counts[self._zeros_index]
+        return int(current_range * (zeros / (zeros + self._counts[self._ones_index])))
+
+    def estimate_bit(self, bit: bool) -> float:
+        zeros = self._counts[self._zeros_index]
+        ones = self._counts[self._ones_index]
+
+        if self.cost_table:
+            return frequency_cost(ones if bit else zeros, zeros + ones)
+        return -np.log2((ones if bit else zeros) / (zeros + ones))
+
+    def set_values(self, values):
+        self._counts[self._zeros_index], self._counts[self._ones_index] = values
+
+    def get_values(self):
+        return self._counts[self._zeros_index], self._counts[self._ones_index]
+
+    def __eq__(self, other) -> bool:
+        return self.get_values() == other.get_values()
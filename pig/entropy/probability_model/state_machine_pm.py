@@ -0,0 +1,122 @@
+from math import log2
+from typing import Literal
+
+from ._probability_model import ProbabilityModel
+
+# Finite-state probability estimation in the style of H.264/AVC CABAC.
+# The state index s represents the probability of the least probable
+# symbol (LPS) as 0.5 * alpha^s, with alpha = (0.01875 / 0.5)^(1 / 63).
+NUMBER_OF_STATES = 64
+_ALPHA = (0.01875 / 0.5) ** (1 / (NUMBER_OF_STATES - 1))
+
+LPS_PROBABILITIES = tuple(0.5 * _ALPHA**state for state in range(NUMBER_OF_STATES))
+
+
+def _closest_state(probability: float) -> int:
+    return min(
+        range(NUMBER_OF_STATES),
+        key=lambda state: abs(LPS_PROBABILITIES[state] / probability - 1),
+    )
+
+
+# After a MPS the LPS probability is scaled by alpha, after a LPS it
+# moves to alpha * p + (1 - alpha), which is snapped to the closest state.
+NEXT_STATE_MPS = tuple(
+    min(state + 1, NUMBER_OF_STATES - 1) for state in range(NUMBER_OF_STATES)
+)
+NEXT_STATE_LPS = tuple(
+    _closest_state(min(_ALPHA * probability + (1 - _ALPHA), 0.5))
+    for probability in LPS_PROBABILITIES
+)
+
+# Costs in bits of each symbol, already exact for every state
+LPS_COSTS = tuple(-log2(probability) for probability in LPS_PROBABILITIES)
+MPS_COSTS = tuple(-log2(1 - probability) for probability in LPS_PROBABILITIES)
+
+# Ranges are normalized to 9 bits, [256, 512), and quantized into 4 bins
+# using the two bits after the most significant one. Each entry holds the
+# LPS sub-range for the center of its bin, so no multiplication is needed.
+RANGE_BITS = 9
+RANGE_TABLE_LPS = tuple(
+    tuple(round(probability * (256 + 64 * quantized + 32)) for quantized in range(4))
+    for probability in LPS_PROBABILITIES
+)
+
+
+class StateMachinePM(ProbabilityModel):
+    """
+    Probability model driven by a finite-state machine, like the H.264 CABAC engine.
+    The interval split is resolved with integer table lookups only, making it
+    a faster alternative to the float division of FrequentistPM.
+    """
+
+    def __init__(self, frequency_of_zeros=1, frequency_of_ones=1, state=0, mps=0):
+        super().__init__(frequency_of_zeros, frequency_of_ones)
+        self._state = state
+        self._mps = mps
+
+    def add_bit(self, bit: bool | Literal[0, 1]) -> None:
+        if bit:
+            self._frequency_of_ones += 1
+        else:
+            self._frequency_of_zeros += 1
+
+        if bit == self._mps:
+            self._state = NEXT_STATE_MPS[self._state]
+            return
+
+        if self._state == 0:
+            self._mps = 1 - self._mps
+        self._state = NEXT_STATE_LPS[self._state]
+
+    def clear(self):
+        super().clear()
+        self._state = 0
+        self._mps = 0
+
+    def split_range(self, current_range: int) -> int:
+        shift = current_range.bit_length() - RANGE_BITS
+        if shift >= 0:
+            quantized = (current_range >> (shift + 6)) & 3
+            lps_range = RANGE_TABLE_LPS[self._state][quantized] << shift
+        else:
+            # Ranges below 256, from low coder precisions, are scaled up to find
+            # the bin and the LPS keeps at least one value
+            quantized = ((current_range << -shift) >> 6) & 3
+            lps_range = max(RANGE_TABLE_LPS[self._state][quantized] >> -shift, 1)
+
+        if self._mps:
+            return lps_range - 1
+        else:
+            return current_range - lps_range
+
+    def probability(self, bit: bool | Literal[0, 1]) -> float:
+        if bit == self._mps:
+            return 1 - LPS_PROBABILITIES[self._state]
+        else:
+            return LPS_PROBABILITIES[self._state]
+
+    def estimate_bit(self, bit: bool) -> float:
+        if bit == self._mps:
+            return MPS_COSTS[self._state]
+        else:
+            return LPS_COSTS[self._state]
+
+    def get_values(self):
+        return (
+            self._frequency_of_zeros,
+            self._frequency_of_ones,
+            self._state,
+            self._mps,
+        )
+
+    def set_values(self, values):
+        (
+            self._frequency_of_zeros,
+            self._frequency_of_ones,
+            self._state,
+            self._mps,
+        ) = values
+
+    def __eq__(self, other) -> bool:
+        return self.get_values() == other.get_values()
@@ -0,0 +1,107 @@
+from bitarray import bitarray
+
+from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+
+from .range_encoder import FULL_RANGE, TOP_VALUE
+
+
+class RangeDecoder:
+    """
+    Byte oriented binary range decoder, the counterpart of the RangeEncoder.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.probability_model = FrequentistPM()
+        self.result = bitarray()
+
+        self.buffer = memoryview(b"")
+        self.position = 0
+
+        self.code = 0
+        self.range = FULL_RANGE
+
+    def use_model(self, model: FrequentistPM):
+        self.probability_model = model
+
+    def decode(
+        self,
+        bits: bitarray | bytes | memoryview,
+        size: int,
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        self.start(bits)
+
+        for _ in range(size):
+            self.decode_bit(model=model)
+
+        return self.end()
+
+    def start(
+        self, bits: bitarray | bytes | memoryview, result: bitarray | None = None
+    ):
+        self.clear()
+        if result is not None:
+            self.result = result
+
+        self.buffer = memoryview(bits).cast("B")
+        for _ in range(4):
+            self.code = (self.code << 8) | self._read_byte()
+        return self
+
+    def decode_bit(self, *, model: FrequentistPM | None = None):
+        if model is not None:
+            self.probability_model = model
+
+        bound = self.probability_model.split_range(self.range - 1) + 1
+
+        if self.code < bound:
+            self.range = bound
+            self.probability_model.add_bit(0)
+            self.result.append(0)
+            output = 0
+        else:
+            self.code -= bound
+            self.range -= bound
+            self.probability_model.add_bit(1)
+            self.result.append(1)
+            output = 1
+
+        while self.range < TOP_VALUE:
+            self.range <<= 8
+            self.code = (self.code << 8) | self._read_byte()
+
+        return output
+
+    def decode_bypass(self, number_of_bits: int) -> int:
+        value = 0
+
+        for remaining in range(number_of_bits, 0, -8):
+            chunk_size = min(remaining, 8)
+
+            self.range >>= chunk_size
+            chunk = self.code // self.range
+            self.code -= chunk * self.range
+            value = (value << chunk_size) | chunk
+
+            while self.range < TOP_VALUE:
+                self.range <<= 8
+                self.code = (self.code << 8) | self._read_byte()
+
+        if number_of_bits > 0:
+            self.result.extend(f"{value:0{number_of_bits}b}")
+        return value
+
+    def end(self):
+        return self.result
+
+    # Internal use
+    def _read_byte(self) -> int:
+        if self.position >= len(self.buffer):
+            return 0
+        byte = self.buffer[self.position]
+        self.position += 1
+        return byte
@@ -0,0 +1,142 @@
+from typing import Literal
+
+from bitarray import bitarray
+
+from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+
+TOP_VALUE = 1 << 24
+FULL_RANGE = (1 << 32) - 1
+
+
+class RangeEncoder:
+    """
+    Byte oriented binary range coder with carry propagation.
+    Based on the range coder used by LZMA (https://www.7-zip.org/sdk.html).
+
+    It is a drop-in replacement of the CabacEncoder, but the renormalization
+    outputs whole bytes instead of single bits, which happens roughly once every
+    eight coded bits instead of once per bit.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.probability_model = FrequentistPM()
+        self.result = bitarray()
+        self.output = bytearray()
+
+        self.low = 0
+        self.range = FULL_RANGE
+        self.cache = 0
+        self.cache_size = 1
+
+    def use_model(self, model: FrequentistPM):
+        self.probability_model = model
+
+    def encode(
+        self,
+        bits: bitarray,
+        fill_to_byte: bool = False,
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        self.start()
+
+        for bit in bits:
+            self.encode_bit(bit, model=model)
+
+        return self.end(fill_to_byte)
+
+    def start(self, result: bitarray | None = None):
+        self.clear()
+        if result is not None:
+            self.result = result
+
+        return self
+
+    def encode_bit(
+        self,
+        bit: bool | Literal[0, 1],
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        if model is not None:
+            self.probability_model = model
+
+        bound = self.probability_model.split_range(self.range - 1) + 1
+
+        if bit:
+            self.low += bound
+            self.range -= bound
+            self.probability_model.add_bit(1)
+        else:
+            self.range = bound
+            self.probability_model.add_bit(0)
+
+        while self.range < TOP_VALUE:
+            self.range <<= 8
+            self._shift_low()
+
+    def encode_bypass(self, bits: int, number_of_bits: int):
+        """
+        Encode the number_of_bits least significant bits of bits, starting from the
+        most significant one, as equiprobable bins that skip the probability models.
+        Up to a byte is coded in a single step.
+        """
+        while number_of_bits > 0:
+            chunk_size = min(number_of_bits, 8)
+            number_of_bits -= chunk_size
+            chunk = (bits >> number_of_bits) & ((1 << chunk_size) - 1)
+
+            self.range >>= chunk_size
+            self.low += chunk * self.range
+
+            while self.range < TOP_VALUE:
+                self.range <<= 8
+                self._shift_low()
+
+    def end(self, fill_to_byte: bool = False):
+        """
+        The codestream is always byte aligned, so fill_to_byte is only kept
+        for compatibility with the CabacEncoder.
+        """
+        self._flush()
+
+        # The first byte is always zero and is implied by the decoder
+        # and trailing zeros are implied when the codestream is over.
+        codestream = memoryview(self.output)[1:]
+        size = len(codestream)
+        while size and codestream[size - 1] == 0:
+            size -= 1
+
+        self.result.frombytes(codestream[:size])
+        return self.result
+
+    # Internal use
+    def _shift_low(self):
+        if self.low < 0xFF000000 or self.low > FULL_RANGE:
+            carry = self.low >> 32
+            temp = self.cache
+            while True:
+                self.output.append((temp + carry) & 0xFF)
+                temp = 0xFF
+                self.cache_size -= 1
+                if self.cache_size == 0:
+                    break
+            self.cache = (self.low >> 24) & 0xFF
+
+        self.cache_size += 1
+        self.low = (self.low << 8) & FULL_RANGE
+
+    def _flush(self):
+        # Choose the value inside [low, low + range) with more trailing zeros,
+        # so most of the flushed bytes can be dropped.
+        for shift in range(32, -1, -8):
+            value = ((self.low + (1 << shift) - 1) >> shift) << shift
+            if value < self.low + self.range:
+                self.low = value
+                break
+
+        for _ in range(5):
+            self._shift_low()
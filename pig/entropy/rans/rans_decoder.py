@@ -0,0 +1,139 @@
+from bitarray import bitarray
+
+from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+
+from .rans_encoder import LOWER_BOUND, PROBABILITY_BITS, PROBABILITY_RANGE, STATE_BYTES
+
+
+class RansDecoder:
+    """
+    Binary adaptive rANS decoder, the counterpart of the RansEncoder.
+    The bins are decoded in order, cycling through the interleaved states.
+    """
+
+    def __init__(self, streams: int = 2):
+        self.streams = streams
+        self.clear()
+
+    def clear(self):
+        self.probability_model = FrequentistPM()
+        self.result = bitarray()
+
+        self.buffer = memoryview(b"")
+        self.position = 0
+
+        self.states = [LOWER_BOUND] * self.streams
+        self.current_stream = 0
+
+    def use_model(self, model: FrequentistPM):
+        self.probability_model = model
+
+    def decode(
+        self,
+        bits: bitarray | bytes | memoryview,
+        size: int,
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        self.start(bits)
+
+        for _ in range(size):
+            self.decode_bit(model=model)
+
+        return self.end()
+
+    def start(
+        self, bits: bitarray | bytes | memoryview, result: bitarray | None = None
+    ):
+        self.clear()
+        if result is not None:
+            self.result = result
+
+        self.buffer = memoryview(bits).cast("B")
+        for stream in range(self.streams):
+            state = 0
+            for _ in range(STATE_BYTES):
+                state = (state << 8) | self._read_byte()
+            self.states[stream] = state
+
+        return self
+
+    def decode_bit(self, *, model: FrequentistPM | None = None):
+        if model is not None:
+            self.probability_model = model
+
+        frequency_of_zeros = (
+            self.probability_model.split_range(PROBABILITY_RANGE - 1) + 1
+        )
+
+        state = self.states[self.current_stream]
+        slot = state & (PROBABILITY_RANGE - 1)
+
+        if slot < frequency_of_zeros:
+            state = frequency_of_zeros * (state >> PROBABILITY_BITS) + slot
+            self.probability_model.add_bit(0)
+            self.result.append(0)
+            output = 0
+        else:
+            frequency_of_ones = PROBABILITY_RANGE - frequency_of_zeros
+            state = (
+                frequency_of_ones * (state >> PROBABILITY_BITS)
+                + slot
+                - frequency_of_zeros
+            )
+            self.probability_model.add_bit(1)
+            self.result.append(1)
+            output = 1
+
+        while state < LOWER_BOUND:
+            state = (state << 8) | self._read_byte()
+
+        self.states[self.current_stream] = state
+        self.current_stream += 1
+        if self.current_stream == self.streams:
+            self.current_stream = 0
+
+        return output
+
+    def decode_bypass(self, number_of_bits: int) -> int:
+        value = 0
+
+        for remaining in range(number_of_bits, 0, -8):
+            chunk_size = min(remaining, 8)
+            frequency_bits = PROBABILITY_BITS - chunk_size
+
+            state = self.states[self.current_stream]
+            slot = state & (PROBABILITY_RANGE - 1)
+            chunk = slot >> frequency_bits
+            state = (
+                (state >> PROBABILITY_BITS << frequency_bits)
+                + slot
+                - (chunk << frequency_bits)
+            )
+            value = (value << chunk_size) | chunk
+
+            self._renormalize(state)
+
+        if number_of_bits > 0:
+            self.result.extend(f"{value:0{number_of_bits}b}")
+        return value
+
+    def end(self):
+        return self.result
+
+    # Internal use
+    def _renormalize(self, state: int):
+        while state < LOWER_BOUND:
+            state = (state << 8) | self._read_byte()
+
+        self.states[self.current_stream] = state
+        self.current_stream += 1
+        if self.current_stream == self.streams:
+            self.current_stream = 0
+
+    def _read_byte(self) -> int:
+        if self.position >= len(self.buffer):
+            return 0
+        byte = self.buffer[self.position]
+        self.position += 1
+        return byte
@@ -0,0 +1,128 @@
+from typing import Literal
+
+from bitarray import bitarray
+
+from pig.entropy.probability_model.frequentist_pm import FrequentistPM
+
+PROBABILITY_BITS = 16
+PROBABILITY_RANGE = 1 << PROBABILITY_BITS
+LOWER_BOUND = 1 << 23
+STATE_BYTES = 4
+
+
+class RansEncoder:
+    """
+    Binary adaptive range Asymmetric Numeral Systems (rANS) coder,
+    with multiple states interleaved in a single byte stream.
+    Based on https://github.com/rygorous/ryg_rans
+
+    rANS works as a stack, so the bins are buffered with the probabilities
+    their models had at the time and are only encoded, in reverse order, at the end.
+    Each interleaved state adds 4 bytes to the codestream.
+    """
+
+    def __init__(self, streams: int = 2):
+        self.streams = streams
+        self.clear()
+
+    def clear(self):
+        self.probability_model = FrequentistPM()
+        self.result = bitarray()
+
+        self._starts: list[int] = []
+        self._frequencies: list[int] = []
+
+    def use_model(self, model: FrequentistPM):
+        self.probability_model = model
+
+    def encode(
+        self,
+        bits: bitarray,
+        fill_to_byte: bool = False,
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        self.start()
+
+        for bit in bits:
+            self.encode_bit(bit, model=model)
+
+        return self.end(fill_to_byte)
+
+    def start(self, result: bitarray | None = None):
+        self.clear()
+        if result is not None:
+            self.result = result
+
+        return self
+
+    def encode_bit(
+        self,
+        bit: bool | Literal[0, 1],
+        *,
+        model: FrequentistPM | None = None,
+    ):
+        if model is not None:
+            self.probability_model = model
+
+        frequency_of_zeros = (
+            self.probability_model.split_range(PROBABILITY_RANGE - 1) + 1
+        )
+
+        if bit:
+            self._starts.append(frequency_of_zeros)
+            self._frequencies.append(PROBABILITY_RANGE - frequency_of_zeros)
+            self.probability_model.add_bit(1)
+        else:
+            self._starts.append(0)
+            self._frequencies.append(frequency_of_zeros)
+            self.probability_model.add_bit(0)
+
+    def encode_bypass(self, bits: int, number_of_bits: int):
+        """
+        Encode the number_of_bits least significant bits of bits, starting from the
+        most significant one, as equiprobable bins that skip the probability models.
+        Up to a byte is coded as a single uniform symbol.
+        """
+        while number_of_bits > 0:
+            chunk_size = min(number_of_bits, 8)
+            number_of_bits -= chunk_size
+            chunk = (bits >> number_of_bits) & ((1 << chunk_size) - 1)
+
+            frequency = 1 << (PROBABILITY_BITS - chunk_size)
+            self._starts.append(chunk * frequency)
+            self._frequencies.append(frequency)
+
+    def end(self, fill_to_byte: bool = False):
+        """
+        The codestream is always byte aligned, so fill_to_byte is only kept
+        for compatibility with the CabacEncoder.
+        """
+        output = bytearray()
+        states = [LOWER_BOUND] * self.streams
+        renormalization_bound = (LOWER_BOUND >> PROBABILITY_BITS) << 8
+
+        for i in reversed(range(len(self._starts))):
+            stream = i % self.streams
+            state = states[stream]
+            frequency = self._frequencies[i]
+
+            state_limit = renormalization_bound * frequency
+            while state >= state_limit:
+                output.append(state & 0xFF)
+                state >>= 8
+
+            quotient, remainder = divmod(state, frequency)
+            states[stream] = (
+                (quotient << PROBABILITY_BITS) + remainder + self._starts[i]
+            )
+
+        for state in reversed(states):
+            for _ in range(STATE_BYTES):
+                output.append(state & 0xFF)
+                state >>= 8
+
+        # The decoder reads the bytes in the opposite order they were written
+        output.reverse()
+        self.result.frombytes(output)
+        return self.result
@@ -1,7 +1,9 @@
 from .image import RawImage
+from .lazy_lightfield import LazyLightField
 from .lightfield import RawLightField
 
 __all__ = [
+    "LazyLightField",
     "RawImage",
     "RawLightField",
 ]
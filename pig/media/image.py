@@ -7,20 +7,25 @@ class RawImage(np.ndarray):
     bitdepth: int
 
     def __new__(cls, image, **kwargs):
+        bitdepth = kwargs.pop("bitdepth", 8)
         obj = np.asarray(image, **kwargs).view(cls)
-        obj.bitdepth = kwargs.get("bitdepth", 8)
+        obj.bitdepth = bitdepth
         return obj
 
     @classmethod
-    def from_file(cls, path: str | Path):
+    def from_file(cls, path: str | Path, mmap: bool = True):
+        """
+        PGX images are memory mapped by default, so only the rows
+        that are used are read from disk.
+        """
         path = Path(path).expanduser()
 
         if path.suffix.lower() == ".pgx":
             from pig.utils.pgx_handler import PGXHandler
 
-            obj = cls(PGXHandler().read(path))
-            obj.bitdepth = 10  # TODO: actually read it
-            return obj
+            handler = PGXHandler()
+            header = handler.read_header(path)
+            return cls(handler.open(path, mmap=mmap), bitdepth=header.depth)
 
         else:
             from PIL import Image
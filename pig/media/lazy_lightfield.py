@@ -0,0 +1,212 @@
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Callable
+
+import numpy as np
+
+from pig.utils.pgx_handler import PGXHandler
+
+from .lightfield import find_views
+
+# Views kept in memory by default, in bytes
+DEFAULT_CACHE_BYTES = 256 << 20
+
+
+class LazyLightField:
+    """
+    A light field shaped (t, s, v, u, channels) that loads its views only when
+    they are used, keeping the most recently used ones in a cache of cache_bytes.
+
+    Views, slices and channels are plain arrays, so block codecs and metrics can
+    work on them. Slicing the first axis reads whole rows of views, which is what
+    the streaming encoders of the blocked codecs do.
+    """
+
+    def __init__(
+        self,
+        load_view: Callable[[int, int], np.ndarray],
+        shape: tuple[int, int, int, int, int],
+        dtype: np.dtype,
+        bitdepth: int,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+    ):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.bitdepth = bitdepth
+        self.cache_bytes = cache_bytes
+
+        self._load_view = load_view
+        self._views: OrderedDict[tuple[int, int], np.ndarray] = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = Lock()
+
+    @classmethod
+    def from_directory(cls, path: str | Path, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Light field stored as one directory per channel, with a memory mapped
+        PGX file per view, in the same structure read by RawLightField.from_file.
+        """
+        path = Path(path).expanduser()
+        n_channels, t_size, s_size, header = find_views(path)
+        reader = PGXHandler()
+
+        def load_view(t: int, s: int) -> np.ndarray:
+            channels = [
+                reader.open(path / f"{c}/{t:03}_{s:03}.pgx") for c in range(n_channels)
+            ]
+            return np.stack(channels, axis=-1).astype(header.dtype.newbyteorder("="))
+
+        shape = (t_size, s_size, *header.shape, n_channels)
+        return cls(
+            load_view, shape, header.dtype.newbyteorder("="), header.depth, cache_bytes
+        )
+
+    @classmethod
+    def from_archive(cls, path: str | Path, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Light field backed by a memory mapped packed archive.
+        """
+        from pig.utils.lightfield_archive import LightFieldArchiveHandler
+
+        handler = LightFieldArchiveHandler()
+        header = handler.read_header(path)
+        return cls.from_array(
+            handler.open(path), header.bitdepth, "view_major", cache_bytes
+        )
+
+    @classmethod
+    def from_array(
+        cls,
+        array: np.ndarray,
+        bitdepth: int,
+        layout: str = "channel_last",
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+    ):
+        """
+        Light field backed by an array, usually a np.memmap of a packed file,
+        in either of the layouts of RawLightField.
+        """
+        if layout == "channel_last":
+            shape = array.shape
+        elif layout == "view_major":
+            t_size, s_size, n_channels, v_size, u_size = array.shape
+            shape = (t_size, s_size, v_size, u_size, n_channels)
+        else:
+            raise ValueError(f'Invalid layout "{layout}"')
+
+        def load_view(t: int, s: int) -> np.ndarray:
+            view = np.array(array[t, s])
+            if layout == "view_major":
+                view = np.ascontiguousarray(np.moveaxis(view, 0, -1))
+            return view
+
+        return cls(load_view, shape, array.dtype, bitdepth, cache_bytes)
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        data = self[:]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key) -> np.ndarray:
+        """
+        Indexes like a (t, s, v, u, channels) array, loading only the views
+        selected by the first two indexes.
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if Ellipsis in key:
+            position = key.index(Ellipsis)
+            missing = self.ndim - len(key) + 1
+            key = key[:position] + (slice(None),) * missing + key[position + 1 :]
+        key = key + (slice(None),) * (self.ndim - len(key))
+
+        t_indexes = np.arange(self.shape[0])[key[0]]
+        s_indexes = np.arange(self.shape[1])[key[1]]
+        view_key = key[2:]
+
+        rows = [
+            np.stack([self.get_view(t, s)[view_key] for s in np.atleast_1d(s_indexes)])
+            for t in np.atleast_1d(t_indexes)
+        ]
+        data = np.stack(rows)
+
+        if np.ndim(s_indexes) == 0:
+            data = data[:, 0]
+        if np.ndim(t_indexes) == 0:
+            data = data[0]
+        return data
+
+    def channels(self):
+        return self.shape[4]
+
+    def t(self):
+        return self.shape[0]
+
+    def s(self):
+        return self.shape[1]
+
+    def v(self):
+        return self.shape[2]
+
+    def u(self):
+        return self.shape[3]
+
+    def number_of_pixels(self):
+        return self.t() * self.s() * self.v() * self.u()
+
+    def number_of_samples(self):
+        return self.number_of_pixels() * self.channels()
+
+    def get_pixel(self, t: int, s: int, v: int, u: int) -> np.ndarray:
+        return self.get_view(t, s)[v, u]
+
+    def get_sample(self, t: int, s: int, v: int, u: int, channel: int) -> int:
+        return self.get_view(t, s)[v, u, channel]
+
+    def get_view(self, t: int, s: int) -> np.ndarray:
+        """
+        The view at (t, s), shaped (v, u, channels) like RawLightField.get_view,
+        even for a "view_major" archive. It is shared with the cache, so it is
+        read-only.
+        """
+        index = (self._wrap(t, self.t(), "t"), self._wrap(s, self.s(), "s"))
+        with self._lock:
+            view = self._views.get(index)
+            if view is not None:
+                self._views.move_to_end(index)
+                return view
+
+        view = self._load_view(*index)
+        view.flags.writeable = False
+
+        with self._lock:
+            if index not in self._views:
+                self._views[index] = view
+                self._cached_bytes += view.nbytes
+            self._evict()
+        return view
+
+    def get_channel(self, channel: int) -> np.ndarray:
+        return self[..., channel]
+
+    def _wrap(self, index: int, size: int, axis: str) -> int:
+        # Negative indexes count from the end, like in RawLightField.get_view
+        index = int(index)
+        if not -size <= index < size:
+            raise IndexError(
+                f"index {index} is out of bounds for axis {axis} with size {size}"
+            )
+        return index % size
+
+    def _evict(self) -> None:
+        # The most recent view is always kept, even if it is larger than the budget
+        while self._cached_bytes > self.cache_bytes and len(self._views) > 1:
+            _, view = self._views.popitem(last=False)
+            self._cached_bytes -= view.nbytes
@@ -2,67 +2,113 @@ from pathlib import Path
 
 import numpy as np
 
+from pig.utils.pgx_handler import PGXHandler, PGXHeader
+
 
 class RawLightField(np.ndarray):
     bitdepth: int
+    layout: str
+    throughput: float | None
 
     def __new__(cls, lightfield, **kwargs):
         bitdepth = kwargs.pop("bitdepth", 8)
+        layout = kwargs.pop("layout", "channel_last")
         obj = np.asarray(lightfield, **kwargs).view(cls)
         obj.bitdepth = bitdepth
+        obj.layout = layout
         return obj
 
-    @classmethod
-    def from_file(cls, path: str | Path):
-        import re
-
-        from pig.utils.pgx_handler import PGXHandler
+    def __array_finalize__(self, obj):
+        self.bitdepth = getattr(obj, "bitdepth", 8)
+        self.layout = getattr(obj, "layout", "channel_last")
+        # Only measured when loading, so derived light fields have none
+        self.throughput = None
 
-        t_view_regex = re.compile(r"[0-9]+(?=_)")
-        s_view_regex = re.compile(r"(?<=_)[0-9]+")
+    @classmethod
+    def from_file(
+        cls,
+        path: str | Path,
+        *,
+        layout: str = "channel_last",
+        workers: int | None = None,
+    ):
+        """
+        Reads every view concurrently, with workers threads, into a single array
+        with the smallest dtype for the bitdepth, like uint16 for 10 bits.
+
+        The layout is either "channel_last", shaped (t, s, v, u, channels), or
+        "view_major", shaped (t, s, channels, v, u), where every view is contiguous.
+        The throughput attribute has the bytes loaded per second, it is None for
+        light fields that were not loaded with from_file.
+
+        The path can also be a packed light field archive, read in a single pass.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from time import perf_counter
+
+        if layout not in ("channel_last", "view_major"):
+            raise ValueError(f'Invalid layout "{layout}"')
 
         path = Path(path).expanduser()
+        if path.is_file():
+            return cls._from_archive(path, layout)
+
         reader = PGXHandler()
 
-        n_channels = 0
-        t_size = 0
-        s_size = 0
-        v_size = 0
-        u_size = 0
-        bitdepth = 0
-
-        max_channel = max(path.glob("*"))
-        max_view_path = max(max_channel.glob("*"))
-        with open(max_view_path, "rb") as file:
-            max_view_header = reader._read_header(file)
-            bitdepth = max_view_header.depth
-
-        n_channels = int(max_channel.name) + 1
-
-        try:
-            t_size = int(t_view_regex.search(max_view_path.stem).group())
-            s_size = int(s_view_regex.search(max_view_path.stem).group())
-        except Exception as e:
-            raise ValueError("Invalid light field name") from e
-
-        v_size = max_view_header.height
-        u_size = max_view_header.width
-        t_size += 1
-        s_size += 1
-
-        data = np.empty((t_size, s_size, v_size, u_size, n_channels), dtype=int)
-        for c in range(n_channels):
-            for t in range(t_size):
-                for s in range(s_size):
-                    view = reader.read(path / f"{c}/{t:03}_{s:03}.pgx")
-                    data[t, s, :, :, c] = view
-
-        return cls(data, bitdepth=bitdepth)
+        n_channels, t_size, s_size, header = find_views(path)
+        v_size, u_size = header.shape
+        dtype = header.dtype.newbyteorder("=")
+
+        if layout == "channel_last":
+            data = np.empty((t_size, s_size, v_size, u_size, n_channels), dtype=dtype)
+        else:
+            data = np.empty((t_size, s_size, n_channels, v_size, u_size), dtype=dtype)
+
+        def read_view(c: int, t: int, s: int):
+            view = reader.open(path / f"{c}/{t:03}_{s:03}.pgx", mmap=False)
+            if layout == "channel_last":
+                data[t, s, :, :, c] = view
+            else:
+                data[t, s, c] = view
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(read_view, c, t, s)
+                for c in range(n_channels)
+                for t in range(t_size)
+                for s in range(s_size)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = perf_counter() - start
+
+        obj = cls(data, bitdepth=header.depth, layout=layout)
+        obj.throughput = data.nbytes / elapsed if elapsed > 0 else float("inf")
+        return obj
+
+    @classmethod
+    def _from_archive(cls, path: Path, layout: str):
+        from time import perf_counter
+
+        from pig.utils.lightfield_archive import LightFieldArchiveHandler
+
+        handler = LightFieldArchiveHandler()
+        start = perf_counter()
+        header = handler.read_header(path)
+        data = handler.read(path)
+        if layout == "channel_last":
+            data = np.ascontiguousarray(np.moveaxis(data, 2, -1))
+        elapsed = perf_counter() - start
+
+        obj = cls(data, bitdepth=header.bitdepth, layout=layout)
+        obj.throughput = data.nbytes / elapsed if elapsed > 0 else float("inf")
+        return obj
 
     def channels(self):
-        if self.ndim < 3:
+        if self.ndim < 5:
             return 1
-        return self.shape[4]
+        return self.shape[self._channel_axis()]
 
     def t(self):
         return self.shape[0]
@@ -71,10 +117,10 @@ class RawLightField(np.ndarray):
         return self.shape[1]
 
     def v(self):
-        return self.shape[2]
+        return self.shape[-2] if self.layout == "view_major" else self.shape[2]
 
     def u(self):
-        return self.shape[3]
+        return self.shape[-1] if self.layout == "view_major" else self.shape[3]
 
     def number_of_pixels(self):
         return self.t() * self.s() * self.v() * self.u()
@@ -83,13 +129,58 @@ class RawLightField(np.ndarray):
         return self.number_of_pixels() * self.channels()
 
     def get_pixel(self, t: int, s: int, v: int, u: int) -> np.ndarray:
+        if self.layout == "view_major":
+            return self[t, s, :, v, u]
         return self[t, s, v, u]
 
     def get_sample(self, t: int, s: int, v: int, u: int, channel: int) -> int:
+        if self.layout == "view_major":
+            return self[t, s, channel, v, u]
         return self[t, s, v, u, channel]
 
     def get_view(self, t: int, s: int) -> np.ndarray:
+        """
+        The view at (t, s), shaped (v, u, channels) in either layout, like the
+        views of LazyLightField. With "view_major" it is a transposed view.
+        """
+        if self.layout == "view_major":
+            return np.moveaxis(self[t, s], 0, -1)
         return self[t, s]
 
     def get_channel(self, channel: int) -> np.ndarray:
-        return self[:, :, :, :, channel]
+        return np.take(self, channel, axis=self._channel_axis())
+
+    def _channel_axis(self) -> int:
+        return 2 if self.layout == "view_major" else 4
+
+
+def find_views(path: Path) -> tuple[int, int, int, PGXHeader]:
+    """
+    Finds the number of channels and the grid of views of a light field stored as
+    one directory per channel, with a "t_s.pgx" file per view, and the header of a view.
+    """
+    import re
+
+    t_view_regex = re.compile(r"[0-9]+(?=_)")
+    s_view_regex = re.compile(r"(?<=_)[0-9]+")
+
+    channels = [
+        int(channel.name) for channel in path.iterdir() if channel.name.isdigit()
+    ]
+    if not channels:
+        raise ValueError("Invalid light field name")
+    n_channels = max(channels) + 1
+
+    view_paths = list((path / "0").glob("*.pgx"))
+    try:
+        t_size = (
+            max(int(t_view_regex.search(view.stem).group()) for view in view_paths) + 1
+        )
+        s_size = (
+            max(int(s_view_regex.search(view.stem).group()) for view in view_paths) + 1
+        )
+    except Exception as e:
+        raise ValueError("Invalid light field name") from e
+
+    header = PGXHandler().read_header(view_paths[0])
+    return n_channels, t_size, s_size, header
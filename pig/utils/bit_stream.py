@@ -0,0 +1,142 @@
+from typing import Iterable
+
+from bitarray import bitarray
+from bitarray.util import ba2int, int2ba
+
+
+class BitWriter:
+    """
+    Appends unsigned integers and bitstreams to a growing bitarray.
+    """
+
+    def __init__(self, bits: bitarray | None = None):
+        self.bits = bitarray() if bits is None else bits
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def write(self, value: int, number_of_bits: int) -> None:
+        if number_of_bits > 0:
+            self.bits.extend(int2ba(int(value), length=number_of_bits))
+
+    def write_many(self, values: Iterable[int], number_of_bits: int) -> None:
+        """
+        Writes every value with the same number of bits, in a single extend.
+        Like write, raises OverflowError if a value does not fit.
+        """
+        if number_of_bits > 0:
+            values = [int(value) for value in values]
+            limit = 1 << number_of_bits
+            for value in values:
+                if not 0 <= value < limit:
+                    raise OverflowError(
+                        f"unsigned integer not in range(0, {limit}), got {value}"
+                    )
+            self.bits.extend("".join(f"{value:0{number_of_bits}b}" for value in values))
+
+    def write_bits(self, bits: bitarray | bytes) -> None:
+        if isinstance(bits, bitarray):
+            self.bits.extend(bits)
+        else:
+            self.bits.frombytes(bits)
+
+    def align(self) -> None:
+        """
+        Pads with zeros up to the next byte boundary.
+        """
+        self.bits.extend(bitarray(-len(self.bits) % 8))
+
+    def getvalue(self) -> bitarray:
+        return self.bits
+
+
+class BitReader:
+    """
+    Reads unsigned integers and sub-streams through a cursor, never copying
+    what is left of the stream. Sub-streams of whole bytes starting at a
+    byte boundary are views over the same memory.
+    """
+
+    def __init__(self, bits: bitarray | bytes | memoryview, position: int = 0):
+        if isinstance(bits, bitarray):
+            self.bits = bits
+        else:
+            self.bits = bitarray(buffer=bits)
+        self.position = position
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    @property
+    def remaining(self) -> int:
+        return len(self.bits) - self.position
+
+    def read(self, number_of_bits: int) -> int:
+        if number_of_bits <= 0:
+            return 0
+        end = self.position + number_of_bits
+        if end > len(self.bits):
+            raise EOFError(
+                f"Cannot read {number_of_bits} bits, only {self.remaining} left"
+            )
+
+        value = ba2int(self.bits[self.position : end])
+        self.position = end
+        return value
+
+    def read_many(self, count: int, number_of_bits: int) -> list[int]:
+        """
+        Reads count values with the same number of bits.
+        """
+        if number_of_bits <= 0:
+            return [0] * count
+
+        chunk = self.read_bits(count * number_of_bits)
+        return [
+            ba2int(chunk[start : start + number_of_bits])
+            for start in range(0, len(chunk), number_of_bits)
+        ]
+
+    def read_bits(self, number_of_bits: int) -> bitarray:
+        """
+        Reads a sub-stream. It is a view if the cursor is at a byte boundary and
+        number_of_bits is a multiple of 8, otherwise it is a copy.
+        """
+        end = self.position + number_of_bits
+        if end > len(self.bits):
+            raise EOFError(
+                f"Cannot read {number_of_bits} bits, only {self.remaining} left"
+            )
+
+        if self.position % 8 == 0 and number_of_bits % 8 == 0:
+            sub_stream = bitarray(buffer=self.buffer()[self.position // 8 : end // 8])
+        else:
+            sub_stream = self.bits[self.position : end]
+
+        self.position = end
+        return sub_stream
+
+    def read_bytes(self, number_of_bytes: int) -> memoryview:
+        """
+        Reads whole bytes as a view, the cursor must be at a byte boundary.
+        """
+        if self.position % 8 != 0:
+            raise ValueError("Bytes can only be read at a byte boundary")
+
+        start = self.position // 8
+        if start + number_of_bytes > len(self.bits) // 8:
+            raise EOFError(
+                f"Cannot read {number_of_bytes} bytes, only {self.remaining} bits left"
+            )
+
+        self.position += 8 * number_of_bytes
+        return self.buffer()[start : start + number_of_bytes]
+
+    def align(self) -> None:
+        """
+        Skips to the next byte boundary.
+        """
+        self.position += -self.position % 8
+
+    def buffer(self) -> memoryview:
+        return memoryview(self.bits).toreadonly()
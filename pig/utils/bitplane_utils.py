@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def bitplane_statistics(
+    magnitudes: np.ndarray,
+    number_of_bitplanes: int,
+    *,
+    strict: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Statistics of the first number_of_bitplanes bitplanes of non-negative magnitudes.
+
+    For every bitplane i it returns how many magnitudes are significant (>= 2^i,
+    or > 2^i if strict), how many of those have the bit i set, and the energy that
+    is lost if all bits below i are truncated.
+    """
+
+    magnitudes = np.asarray(magnitudes, dtype=np.int64).ravel()
+    bit_positions = np.left_shift(1, np.arange(number_of_bitplanes, dtype=np.int64))
+    bit_positions = bit_positions[:, np.newaxis]
+
+    # A magnitude is significant in every bitplane below its bit length
+    mantissas, bit_lengths = np.frexp(magnitudes)
+    histogram = np.bincount(bit_lengths, minlength=number_of_bitplanes + 1)
+    significant = np.cumsum(histogram[::-1])[::-1][1 : number_of_bitplanes + 1]
+    ones = np.count_nonzero(magnitudes & bit_positions, axis=1)
+
+    if strict:
+        # Powers of two 2^i have the bit i set, but are not significant in it
+        powers = np.bincount(
+            bit_lengths[mantissas == 0.5] - 1, minlength=number_of_bitplanes
+        )
+        powers = powers[:number_of_bitplanes]
+        significant = significant - powers
+        ones = ones - powers
+
+    truncated = magnitudes & (bit_positions - 1)
+    energies = np.einsum("ij,ij->i", truncated, truncated).astype(np.float64)
+
+    return significant, ones, energies
@@ -0,0 +1,139 @@
+from functools import reduce
+from itertools import product
+
+import numpy as np
+
+Node = tuple[int, tuple[int, ...]]
+
+
+class BlockPyramid:
+    """
+    Multi-resolution statistics of a block, following the same hierarchy of
+    split_blocks_in_half. Every node stores the bitwise OR of the magnitudes
+    and the energy of its sub-block, so they can be queried in O(1).
+
+    A node is identified by its depth and by the index of its interval in
+    each dimension, as all dimensions are split at the same time.
+    """
+
+    def __init__(self, block: np.ndarray):
+        self.block = block
+        self.magnitudes = np.abs(block).astype(np.int64)
+        self.squares = block.astype(np.float64) ** 2
+
+        # For each depth, the (starts, stops) of the intervals of each dimension
+        self.intervals: list[list[tuple[np.ndarray, np.ndarray]]] = []
+        # For each depth, the children of each interval of each dimension
+        self._children: list[list[list[tuple[int, ...]]]] = []
+
+        self.ors: list[np.ndarray] = []
+        self.energies: list[np.ndarray] = []
+        self.sizes: list[np.ndarray] = []
+
+        intervals = [(np.array([0]), np.array([length])) for length in block.shape]
+        while True:
+            self._add_depth(intervals)
+            if not any(np.any(stops - starts > 1) for starts, stops in intervals):
+                break
+            intervals = self._split_intervals(intervals)
+
+    @property
+    def root(self) -> Node:
+        return (0, (0,) * self.block.ndim)
+
+    @property
+    def depth(self) -> int:
+        return len(self.intervals)
+
+    def magnitude_or(self, node: Node) -> int:
+        depth, index = node
+        return int(self.ors[depth][index])
+
+    def energy(self, node: Node) -> float:
+        depth, index = node
+        return self.energies[depth][index]
+
+    def size(self, node: Node) -> int:
+        depth, index = node
+        return int(self.sizes[depth][index])
+
+    def is_bitplane_zero(self, node: Node, bitplane: int) -> bool:
+        return not (self.magnitude_or(node) & 1 << (bitplane - 1))
+
+    def max_bitplane(self, node: Node | None = None) -> int:
+        if node is None:
+            node = self.root
+        return self.magnitude_or(node).bit_length()
+
+    def position(self, node: Node) -> tuple[slice, ...]:
+        depth, index = node
+        return tuple(
+            slice(int(starts[i]), int(stops[i]))
+            for (starts, stops), i in zip(self.intervals[depth], index)
+        )
+
+    def value(self, node: Node):
+        """
+        First value of the sub-block, which is the only one for unit nodes.
+        """
+        depth, index = node
+        start = tuple(
+            int(starts[i]) for (starts, _), i in zip(self.intervals[depth], index)
+        )
+        return self.block[start]
+
+    def children(self, node: Node) -> list[Node]:
+        depth, index = node
+        children_per_dimension = [
+            self._children[depth][axis][i] for axis, i in enumerate(index)
+        ]
+        return [(depth + 1, child) for child in product(*children_per_dimension)]
+
+    def _add_depth(self, intervals: list[tuple[np.ndarray, np.ndarray]]):
+        self.intervals.append(intervals)
+        self.ors.append(self._reduce(np.bitwise_or, self.magnitudes, intervals))
+        self.energies.append(self._reduce(np.add, self.squares, intervals))
+
+        lengths = [stops - starts for starts, stops in intervals]
+        self.sizes.append(reduce(np.multiply, np.ix_(*lengths)))
+
+    def _split_intervals(self, intervals: list[tuple[np.ndarray, np.ndarray]]):
+        new_intervals = []
+        children = []
+
+        for starts, stops in intervals:
+            new_starts = []
+            new_stops = []
+            children_of_axis = []
+
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                half = start + (stop - start) // 2
+
+                # split_blocks_in_half works on relative shapes, so a dimension
+                # of size 1 is kept as it is instead of yielding an empty half
+                if stop - start <= 1:
+                    bounds = [(start, stop)]
+                else:
+                    bounds = [(start, half), (half, stop)]
+
+                first = len(new_starts)
+                children_of_axis.append(tuple(range(first, first + len(bounds))))
+                for child_start, child_stop in bounds:
+                    new_starts.append(child_start)
+                    new_stops.append(child_stop)
+
+            new_intervals.append((np.array(new_starts), np.array(new_stops)))
+            children.append(children_of_axis)
+
+        self._children.append(children)
+        return new_intervals
+
+    @staticmethod
+    def _reduce(ufunc: np.ufunc, array: np.ndarray, intervals) -> np.ndarray:
+        """
+        Reduce the array over every sub-block of a depth at once, one axis at a time.
+        The intervals of each axis are contiguous and not empty, so reduceat can be used.
+        """
+        for axis, (starts, _) in enumerate(intervals):
+            array = ufunc.reduceat(array, starts, axis=axis)
+        return array
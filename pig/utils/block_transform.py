@@ -0,0 +1,133 @@
+from itertools import product
+from math import ceil
+from typing import Generator
+
+import numpy as np
+from scipy.fft import dctn, idctn
+
+Region = tuple[tuple[slice, ...], tuple[int, ...], tuple[int, ...], np.ndarray]
+
+
+def block_dctn(
+    data: np.ndarray,
+    block_size: int,
+    *,
+    workers: int | None = None,
+) -> list[np.ndarray]:
+    """
+    Orthonormal DCT of every block of split_blocks_equal_size, rounded to integers.
+
+    Instead of one dctn call per block, the blocks of each region of the grid
+    that share a shape (the full blocks, and the smaller ones at the edges) are
+    reshaped into a stack and transformed at once with a single call.
+    """
+    blocks: list[np.ndarray] = [None] * _number_of_blocks(data.shape, block_size)
+
+    for region, counts, block_shape, indexes in _grid_regions(data.shape, block_size):
+        stack = _to_stack(data[region], counts, block_shape)
+        transformed = dctn(
+            stack, axes=_block_axes(stack), norm="ortho", workers=workers
+        )
+
+        rounded = np.empty(transformed.shape, dtype=int)
+        np.rint(transformed, out=rounded, casting="unsafe")
+
+        for index, block in zip(indexes, rounded):
+            blocks[index] = block
+
+    return blocks
+
+
+def block_idctn(
+    blocks: list[np.ndarray],
+    shape: tuple[int, ...],
+    block_size: int,
+    *,
+    workers: int | None = None,
+) -> np.ndarray:
+    """
+    Inverse of block_dctn, blocks are given in the order of split_blocks_equal_size.
+    """
+    data = np.empty(shape, dtype=int)
+
+    for region, counts, block_shape, indexes in _grid_regions(shape, block_size):
+        stack = np.stack([blocks[index] for index in indexes])
+        transformed = idctn(
+            stack, axes=_block_axes(stack), norm="ortho", workers=workers
+        )
+
+        region_shape = data[region].shape
+        rounded = _from_stack(transformed, counts, block_shape)
+        np.rint(rounded.reshape(region_shape), out=data[region], casting="unsafe")
+
+    return data
+
+
+def _number_of_blocks(shape: tuple[int, ...], block_size: int) -> int:
+    return int(np.prod([ceil(size / block_size) for size in shape]))
+
+
+def _block_axes(stack: np.ndarray) -> tuple[int, ...]:
+    return tuple(range(1, stack.ndim))
+
+
+def _grid_regions(
+    shape: tuple[int, ...], block_size: int
+) -> Generator[Region, None, None]:
+    """
+    Split the grid of blocks into regions where all blocks have the same shape.
+    In each dimension, the blocks are either full or the remainder at the edge.
+    Besides the region and its blocks, yields the indexes of its blocks in the
+    order used by split_blocks_equal_size.
+    """
+    parts_per_dimension = []
+    for size in shape:
+        full = size // block_size
+        remainder = size - full * block_size
+
+        parts = []
+        if full > 0:
+            parts.append((slice(0, full * block_size), range(0, full), block_size))
+        if remainder > 0:
+            parts.append(
+                (slice(full * block_size, size), range(full, full + 1), remainder)
+            )
+        parts_per_dimension.append(parts)
+
+    grid_shape = tuple(ceil(size / block_size) for size in shape)
+    for parts in product(*parts_per_dimension):
+        region = tuple(part[0] for part in parts)
+        counts = tuple(len(part[1]) for part in parts)
+        block_shape = tuple(part[2] for part in parts)
+
+        grid_positions = np.meshgrid(*(part[1] for part in parts), indexing="ij")
+        indexes = np.ravel_multi_index(grid_positions, grid_shape).reshape(-1)
+        yield region, counts, block_shape, indexes
+
+
+def _to_stack(
+    region: np.ndarray, counts: tuple[int, ...], block_shape: tuple[int, ...]
+):
+    """
+    (n0 * b0, n1 * b1, ...) -> (n0 * n1 * ..., b0, b1, ...)
+    """
+    ndim = len(counts)
+    interleaved = region.reshape(
+        [value for pair in zip(counts, block_shape) for value in pair]
+    )
+    order = tuple(range(0, 2 * ndim, 2)) + tuple(range(1, 2 * ndim, 2))
+    return interleaved.transpose(order).reshape((-1, *block_shape))
+
+
+def _from_stack(
+    stack: np.ndarray, counts: tuple[int, ...], block_shape: tuple[int, ...]
+):
+    """
+    (n0 * n1 * ..., b0, b1, ...) -> (n0, b0, n1, b1, ...)
+    """
+    ndim = len(counts)
+    grid = stack.reshape((*counts, *block_shape))
+    order = tuple(
+        axis for pair in zip(range(ndim), range(ndim, 2 * ndim)) for axis in pair
+    )
+    return grid.transpose(order)
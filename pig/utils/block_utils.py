@@ -49,5 +49,19 @@ def split_blocks_equal_size(block: np.ndarray, block_size: int) -> list[np.ndarr
     return split_blocks
 
 
+def block_shapes_equal_size(
+    shape: tuple[int, ...], block_size: int
+) -> list[tuple[int, ...]]:
+    """
+    Shapes of the blocks of split_blocks_equal_size, without needing the data.
+    """
+    sizes_per_dimension = []
+    for size in shape:
+        keypoints = chain(range(0, size, block_size), [size])
+        sizes_per_dimension.append(tuple(b - a for (a, b) in pairwise(keypoints)))
+
+    return list(product(*sizes_per_dimension))
+
+
 def bigger_possible_slice(shape: tuple[int]) -> tuple[slice]:
     return tuple(slice(0, size) for size in shape)
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class IntegralImage:
+    """
+    N-dimensional summed-area table. The sum of any rectangular region,
+    given as a tuple of slices, is found with 2^ndim lookups instead of a
+    scan of the region.
+    """
+
+    def __init__(self, values: np.ndarray):
+        values = np.asarray(values)
+        dtype = np.float64 if np.issubdtype(values.dtype, np.floating) else np.int64
+
+        # The table is padded with a zero at the start of each dimension,
+        # so that the lookups of regions touching the border need no checks
+        self.table = np.zeros(tuple(size + 1 for size in values.shape), dtype=dtype)
+        self.table[(slice(1, None),) * values.ndim] = values
+        for axis in range(values.ndim):
+            np.cumsum(self.table, axis=axis, out=self.table)
+
+        # Lookups are done in a flat python list, which is much faster
+        # than indexing numpy arrays one element at a time
+        self._flat = self.table.ravel().tolist()
+        self._strides = [stride // self.table.itemsize for stride in self.table.strides]
+
+    @property
+    def ndim(self) -> int:
+        return self.table.ndim
+
+    def sum(self, position: tuple[slice, ...]) -> int | float:
+        corner = 0
+        positive = [0]
+        negative = []
+
+        # Inclusion-exclusion over the corners, moving from the start corner
+        # to the stop corner one dimension at a time
+        for s, stride in zip(position, self._strides):
+            corner += s.start * stride
+            step = (s.stop - s.start) * stride
+            positive, negative = (
+                [i + step for i in positive] + negative,
+                [i + step for i in negative] + positive,
+            )
+
+        flat = self._flat
+        total = 0
+        for i in positive:
+            total += flat[corner + i]
+        for i in negative:
+            total -= flat[corner + i]
+        return total
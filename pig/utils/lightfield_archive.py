@@ -0,0 +1,246 @@
+import struct
+from dataclasses import dataclass
+from io import BufferedReader, BufferedWriter
+from math import prod
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+
+from pig.utils.pgx_handler import PGXHandler
+
+MAGIC = b"PGLF"
+VERSION = 1
+
+# Views start at multiples of the page size, so each one can be mapped on its own
+PAGE_SIZE = 4096
+
+# magic, version, t, s, v, u, channels, bitdepth, dtype and the bytes between views
+HEADER_STRUCT = struct.Struct(">4sH5IB4sQ")
+
+
+@dataclass
+class LightFieldArchiveHeader:
+    t: int
+    s: int
+    v: int
+    u: int
+    channels: int
+    bitdepth: int
+    dtype: np.dtype
+    view_stride: int
+    view_offsets: list[int]
+
+    @property
+    def view_shape(self) -> tuple[int, int, int]:
+        return (self.channels, self.v, self.u)
+
+    @property
+    def view_bytes(self) -> int:
+        return prod(self.view_shape) * self.dtype.itemsize
+
+
+class LightFieldArchiveHandler:
+    """
+    Light fields packed in a single file. It has a fixed header, an index with the
+    offset of every view and the views in (t, s) order. Each view is shaped
+    (channels, v, u) and starts at a page boundary.
+    """
+
+    def read(self, path: Union[str, Path]) -> np.ndarray:
+        """
+        The whole light field, in the view_major layout (t, s, channels, v, u).
+        """
+        with open(path, "rb") as file:
+            header = self._read_header(file)
+            data = np.empty(
+                (header.t, header.s, *header.view_shape), dtype=header.dtype
+            )
+            for (t, s), offset in zip(
+                np.ndindex(header.t, header.s), header.view_offsets
+            ):
+                file.seek(offset)
+                view = np.frombuffer(file.read(header.view_bytes), header.dtype)
+                data[t, s] = view.reshape(header.view_shape)
+        return data
+
+    def open(self, path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+        """
+        Like read, but with mmap the light field is a read-only view over a np.memmap,
+        skipping the padding between views, so only the views that are touched are
+        paged in from disk.
+        """
+        if not mmap:
+            return self.read(path)
+
+        header = self.read_header(path)
+        first_offset = header.view_offsets[0]
+
+        # A single strided view needs the views at a uniform stride, as write does it
+        expected = [
+            first_offset + i * header.view_stride
+            for i in range(len(header.view_offsets))
+        ]
+        if header.view_offsets != expected:
+            raise ValueError(
+                "Views are not evenly spaced, they can only be read with mmap=False"
+            )
+        mapped = np.memmap(path, dtype=np.uint8, mode="r")
+
+        itemsize = header.dtype.itemsize
+        strides = (
+            header.s * header.view_stride,
+            header.view_stride,
+            header.v * header.u * itemsize,
+            header.u * itemsize,
+            itemsize,
+        )
+        return np.ndarray(
+            (header.t, header.s, *header.view_shape),
+            dtype=header.dtype,
+            buffer=mapped,
+            offset=first_offset,
+            strides=strides,
+        )
+
+    def read_header(self, path: Union[str, Path]) -> LightFieldArchiveHeader:
+        with open(path, "rb") as file:
+            return self._read_header(file)
+
+    def write(
+        self,
+        path: Union[str, Path],
+        data: np.ndarray,
+        bitdepth: int,
+        layout: str = "channel_last",
+    ):
+        """
+        Writes a light field in either of the layouts of RawLightField.
+        """
+        if layout == "channel_last":
+            data = np.moveaxis(data, -1, 2)
+        elif layout != "view_major":
+            raise ValueError(f'Invalid layout "{layout}"')
+
+        t_size, s_size = data.shape[:2]
+        views = (data[t, s] for t, s in np.ndindex(t_size, s_size))
+        self._write(path, data.shape, data.dtype, bitdepth, views)
+
+    def from_pgx_directory(self, directory: Union[str, Path], path: Union[str, Path]):
+        """
+        Packs a light field stored as one directory per channel, with a PGX file per view.
+        Views are read one at a time, so the light field is never fully in memory.
+        """
+        from pig.media.lightfield import find_views
+
+        directory = Path(directory).expanduser()
+        n_channels, t_size, s_size, pgx_header = find_views(directory)
+        reader = PGXHandler()
+
+        def read_views():
+            for t, s in np.ndindex(t_size, s_size):
+                channels = [
+                    reader.open(directory / f"{c}/{t:03}_{s:03}.pgx")
+                    for c in range(n_channels)
+                ]
+                yield np.stack(channels)
+
+        shape = (t_size, s_size, n_channels, *pgx_header.shape)
+        dtype = pgx_header.dtype.newbyteorder("=")
+        self._write(path, shape, dtype, pgx_header.depth, read_views())
+
+    def to_pgx_directory(self, path: Union[str, Path], directory: Union[str, Path]):
+        """
+        Unpacks an archive into one directory per channel, with a PGX file per view.
+        """
+        directory = Path(directory).expanduser()
+        header = self.read_header(path)
+        data = self.open(path)
+        writer = PGXHandler()
+
+        for c in range(header.channels):
+            (directory / str(c)).mkdir(parents=True, exist_ok=True)
+            for t, s in np.ndindex(header.t, header.s):
+                view_path = directory / f"{c}/{t:03}_{s:03}.pgx"
+                writer.write(view_path, data[t, s, c], depth=header.bitdepth)
+
+    def _write(
+        self,
+        path: Union[str, Path],
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+        bitdepth: int,
+        views: Iterable[np.ndarray],
+    ):
+        t_size, s_size, n_channels, v_size, u_size = shape
+        dtype = np.dtype(dtype)
+
+        view_bytes = n_channels * v_size * u_size * dtype.itemsize
+        view_stride = self._page_align(view_bytes)
+        index_bytes = 8 * t_size * s_size
+        first_offset = self._page_align(HEADER_STRUCT.size + index_bytes)
+        view_offsets = [first_offset + i * view_stride for i in range(t_size * s_size)]
+
+        with open(path, "wb") as file:
+            self._write_header(
+                file,
+                LightFieldArchiveHeader(
+                    t_size,
+                    s_size,
+                    v_size,
+                    u_size,
+                    n_channels,
+                    bitdepth,
+                    dtype,
+                    view_stride,
+                    view_offsets,
+                ),
+            )
+            for view, offset in zip(views, view_offsets):
+                file.seek(offset)
+                file.write(np.ascontiguousarray(view, dtype=dtype).tobytes())
+
+            # The last view is padded too, so every view can be mapped whole
+            file.truncate(
+                view_offsets[-1] + view_stride if view_offsets else first_offset
+            )
+
+    def _read_header(self, file: BufferedReader) -> LightFieldArchiveHeader:
+        fields = HEADER_STRUCT.unpack(file.read(HEADER_STRUCT.size))
+        magic, version, t, s, v, u, channels, bitdepth, dtype, view_stride = fields
+
+        if magic != MAGIC:
+            raise ValueError(f'Invalid magic "{magic}"')
+
+        if version != VERSION:
+            raise ValueError(f'Invalid version "{version}"')
+
+        number_of_views = t * s
+        view_offsets = np.frombuffer(
+            file.read(8 * number_of_views), dtype=">u8"
+        ).tolist()
+        dtype = np.dtype(dtype.decode("ascii").strip())
+
+        return LightFieldArchiveHeader(
+            t, s, v, u, channels, bitdepth, dtype, view_stride, view_offsets
+        )
+
+    def _write_header(self, file: BufferedWriter, header: LightFieldArchiveHeader):
+        file.write(
+            HEADER_STRUCT.pack(
+                MAGIC,
+                VERSION,
+                header.t,
+                header.s,
+                header.v,
+                header.u,
+                header.channels,
+                header.bitdepth,
+                header.dtype.str.encode("ascii").ljust(4),
+                header.view_stride,
+            )
+        )
+        file.write(np.array(header.view_offsets, dtype=">u8").tobytes())
+
+    def _page_align(self, number_of_bytes: int) -> int:
+        return -(-number_of_bytes // PAGE_SIZE) * PAGE_SIZE
@@ -2,6 +2,7 @@ import array
 from dataclasses import dataclass
 from io import BufferedReader, BufferedWriter
 from itertools import count
+from math import ceil
 from pathlib import Path
 from typing import Union
 
@@ -13,7 +14,23 @@ class PGXHeader:
     width: int
     height: int
     depth: int
-    byteorder: int
+    byteorder: str
+    signed: bool = False
+    offset: int = 0
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+        Samples take the smallest of 1, 2 or 4 bytes that fits the depth.
+        """
+        number_of_bytes = 1 << max(ceil(self.depth / 8) - 1, 0).bit_length()
+        kind = "i" if self.signed else "u"
+        prefix = ">" if self.byteorder == "big" else "<"
+        return np.dtype(f"{prefix}{kind}{number_of_bytes}")
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return (self.height, self.width)
 
 
 class PGXHandler:
@@ -23,10 +40,32 @@ class PGXHandler:
             image = self._read_data(file, header)
         return image
 
-    def write(self, path: Union[str, Path], data: np.ndarray):
+    def open(self, path: Union[str, Path], mmap: bool = True) -> np.ndarray:
+        """
+        Like read, but with mmap the samples are a read-only np.memmap,
+        so only the rows that are touched are paged in from disk.
+        """
+        if not mmap:
+            return self.read(path)
+
+        header = self.read_header(path)
+        return np.memmap(
+            path,
+            dtype=header.dtype,
+            mode="r",
+            offset=header.offset,
+            shape=header.shape,
+        )
+
+    def read_header(self, path: Union[str, Path]) -> PGXHeader:
+        with open(path, "rb") as file:
+            return self._read_header(file)
+
+    def write(self, path: Union[str, Path], data: np.ndarray, depth: int = 10):
+        self._check_range(data, depth)
         with open(path, "wb") as file:
-            self._write_header(file, data)
-            self._write_data(file, data)
+            self._write_header(file, data, depth=depth)
+            self._write_data(file, data, depth=depth)
 
     def _read_header(self, file: BufferedReader) -> PGXHeader:
         header = file.readline().decode("utf-8").split()
@@ -65,20 +104,21 @@ class PGXHandler:
         if height <= 0:
             raise ValueError(f'Invalid height "{height}"')
 
-        return PGXHeader(width, height, depth, byteorder)
+        return PGXHeader(width, height, depth, byteorder, signal == "-", file.tell())
 
     def _read_data(self, file: BufferedReader, header: PGXHeader) -> np.ndarray:
-        dtype = "i2"
-        if header.byteorder == "big":
-            dtype = ">" + dtype
-        image_array = np.frombuffer(file.read(), dtype)
-        shape = (header.height, header.width)
-        image_array = image_array.reshape(shape)
-        return image_array
-
-    def _write_header(self, file: BufferedWriter, data: np.ndarray, byteorder: str = "big"):
-        signal = "+"
-        depth = 10
+        number_of_bytes = header.width * header.height * header.dtype.itemsize
+        image_array = np.frombuffer(file.read(number_of_bytes), header.dtype)
+        return image_array.reshape(header.shape)
+
+    def _write_header(
+        self,
+        file: BufferedWriter,
+        data: np.ndarray,
+        byteorder: str = "big",
+        depth: int = 10,
+    ):
+        signal = "-" if self._is_signed(data) else "+"
         height, width = data.shape
 
         file.write(b"PG ")
@@ -91,7 +131,32 @@ class PGXHandler:
         file.write(bytes(signal, "utf8"))
         file.write(bytes(f"{depth} {width} {height} \n", "utf8"))
 
-    def _write_data(self, file: BufferedWriter, data: np.ndarray, byteorder: str = "big"):
-        # we may need to change the byteorder, but I think it is already
-        # encoded in the array itself
-        file.write(data.tobytes())
+    def _write_data(
+        self,
+        file: BufferedWriter,
+        data: np.ndarray,
+        byteorder: str = "big",
+        depth: int = 10,
+    ):
+        # Samples are stored as the header says, whatever the dtype of the array
+        height, width = data.shape
+        header = PGXHeader(width, height, depth, byteorder, self._is_signed(data))
+        file.write(np.asarray(data).astype(header.dtype, copy=False).tobytes())
+
+    def _check_range(self, data: np.ndarray, depth: int):
+        # Samples that do not fit would silently wrap around in the header dtype
+        if data.size == 0:
+            return
+
+        if self._is_signed(data):
+            low, high = -(1 << (depth - 1)), (1 << (depth - 1)) - 1
+        else:
+            low, high = 0, (1 << depth) - 1
+
+        if data.min() < low or data.max() > high:
+            raise ValueError(
+                f'Samples do not fit in depth "{depth}", range is [{low}, {high}]'
+            )
+
+    def _is_signed(self, data: np.ndarray) -> bool:
+        return data.dtype.kind == "i" and data.size > 0 and data.min() < 0
@@ -0,0 +1,52 @@
+from math import log, log2
+
+import numpy as np
+
+from pig.entropy import (
+    FrequentistPM,
+    MicoDecoder,
+    MicoEncoder,
+    MuleEncoder,
+    StateMachinePM,
+)
+
+
+def test_tolerance():
+    # Every probability is at least 1 / 50_001, above 2^-16
+    frequencies = [*range(1, 200), 1_000, 50_000]
+
+    for frequency_of_zeros in frequencies:
+        for frequency_of_ones in frequencies:
+            model = FrequentistPM(frequency_of_zeros, frequency_of_ones)
+            model.cost_table = True
+
+            for bit in (0, 1):
+                probability = model.probability(bit)
+                tolerance = 2**-16 / (probability * log(2)) + 2**-17
+                assert abs(model.estimate_bit(bit) + log2(probability)) <= tolerance
+
+
+def test_state_machine_costs():
+    model = StateMachinePM()
+    for bit in (np.random.random(500) < 0.1).tolist():
+        assert abs(model.estimate_bit(bit) + log2(model.probability(bit))) < 1e-12
+        model.add_bit(bit)
+
+
+def test_optimizers_with_cost_table():
+    original = np.random.randint(-255, 255, (16, 16))
+
+    mule_exact = MuleEncoder()
+    mule_table = MuleEncoder(cost_table=True)
+    mule_exact.encode(original, 100)
+    mule_table.encode(original, 100)
+    assert abs(mule_exact.estimated_rd.rate - mule_table.estimated_rd.rate) < 1
+
+    mico_exact = MicoEncoder()
+    mico_table = MicoEncoder(cost_table=True)
+    mico_exact.encode(original, 100)
+    encoded = mico_table.encode(original, 100)
+    assert abs(mico_exact.estimated_rd.rate - mico_table.estimated_rd.rate) < 1
+
+    decoded = MicoDecoder().decode(encoded, original.shape)
+    assert np.sum((decoded - original) ** 2) == mico_table.estimated_rd.distortion
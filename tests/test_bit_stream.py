@@ -0,0 +1,42 @@
+import pytest
+from bitarray import bitarray
+
+from pig.utils.bit_stream import BitReader, BitWriter
+
+
+def test_write_and_read():
+    writer = BitWriter()
+    writer.write(5, 3)
+    writer.write_many([1, 2, 300], 9)
+    writer.align()
+    writer.write_bits(b"\xab\xcd")
+    writer.write(1, 1)
+    assert len(writer) == 3 + 27 + 2 + 16 + 1
+
+    reader = BitReader(writer.getvalue())
+    assert reader.read(3) == 5
+    assert reader.read_many(3, 9) == [1, 2, 300]
+
+    reader.align()
+    assert reader.read_bits(16).tobytes() == b"\xab\xcd"
+    assert reader.read(1) == 1
+    assert reader.remaining == 0
+
+
+def test_sub_streams_are_views():
+    bits = bitarray()
+    bits.frombytes(b"\x01\x02\x03\x04")
+    reader = BitReader(bits, position=8)
+
+    sub_stream = reader.read_bits(16)
+    assert sub_stream.tobytes() == b"\x02\x03"
+    assert sub_stream.buffer_info()[0] == bits.buffer_info()[0] + 1
+    assert bytes(reader.read_bytes(1)) == b"\x04"
+
+
+@pytest.mark.parametrize("values", [[300], [1, -1]])
+def test_write_many_out_of_range(values):
+    writer = BitWriter()
+    with pytest.raises(OverflowError):
+        writer.write_many(values, 8)
+    assert len(writer) == 0
@@ -0,0 +1,28 @@
+import numpy as np
+
+from pig.metrics import energy
+from pig.utils.bitplane_utils import bitplane_statistics
+
+
+def test_bitplane_statistics():
+    magnitudes = np.abs(np.random.laplace(0, 50, (16, 9)).astype(int))
+    magnitudes[0, :4] = [0, 1, 2, 64]
+    number_of_bitplanes = int(np.max(magnitudes)).bit_length()
+
+    for strict in (False, True):
+        significant, ones, energies = bitplane_statistics(
+            magnitudes,
+            number_of_bitplanes,
+            strict=strict,
+        )
+
+        for i in range(number_of_bitplanes):
+            bit_position = 1 << i
+            if strict:
+                non_zeroed = magnitudes > bit_position
+            else:
+                non_zeroed = magnitudes >= bit_position
+
+            assert significant[i] == np.count_nonzero(non_zeroed)
+            assert ones[i] == np.count_nonzero(magnitudes[non_zeroed] & bit_position)
+            assert energies[i] == energy(magnitudes & (bit_position - 1))
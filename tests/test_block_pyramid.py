@@ -0,0 +1,37 @@
+import numpy as np
+
+from pig.metrics import energy
+from pig.utils.block_pyramid import BlockPyramid
+from pig.utils.block_utils import split_blocks_in_half
+
+
+def check_node(pyramid: BlockPyramid, node, block: np.ndarray):
+    assert pyramid.size(node) == block.size
+    assert pyramid.energy(node) == energy(block)
+    assert pyramid.magnitude_or(node) == np.bitwise_or.reduce(np.abs(block).flatten())
+
+    if block.size > 1:
+        children = pyramid.children(node)
+        sub_blocks = list(split_blocks_in_half(block))
+        assert len(children) == len(sub_blocks)
+
+        for child, sub_block in zip(children, sub_blocks):
+            check_node(pyramid, child, sub_block)
+    else:
+        assert pyramid.value(node) == block.flatten()[0]
+
+
+def test_same_hierarchy_as_split():
+    for shape in [(16, 16), (13, 7), (1, 9), (6, 5, 3), (5,)]:
+        block = np.random.laplace(0, 30, shape).astype(int)
+        pyramid = BlockPyramid(block)
+        check_node(pyramid, pyramid.root, block)
+
+
+def test_bitplane_queries():
+    block = np.array([[0, 3], [-4, 1]])
+    pyramid = BlockPyramid(block)
+
+    assert pyramid.max_bitplane() == 3
+    assert not pyramid.is_bitplane_zero(pyramid.root, 3)
+    assert pyramid.is_bitplane_zero(pyramid.children(pyramid.root)[0], 1)
@@ -0,0 +1,30 @@
+import numpy as np
+from scipy.fft import dctn, idctn
+
+from pig.utils.block_transform import block_dctn, block_idctn
+from pig.utils.block_utils import block_shapes_equal_size, split_blocks_equal_size
+
+
+def test_same_as_transforming_each_block():
+    for shape, block_size in [((40, 37), 16), ((5, 7, 9, 11), 4), ((3,), 4)]:
+        data = np.random.randint(-128, 128, shape)
+        blocks = split_blocks_equal_size(data, block_size)
+        transformed = block_dctn(data, block_size)
+
+        assert [block.shape for block in blocks] == block_shapes_equal_size(
+            shape, block_size
+        )
+        assert len(transformed) == len(blocks)
+        for block, transformed_block in zip(blocks, transformed):
+            expected = dctn(block, norm="ortho").round().astype(int)
+            assert np.array_equal(transformed_block, expected)
+
+        decoded = np.zeros(shape, dtype=int)
+        for block, transformed_block in zip(
+            split_blocks_equal_size(decoded, block_size), transformed
+        ):
+            block[:] = idctn(transformed_block, norm="ortho").round().astype(int)
+
+        assert np.array_equal(
+            block_idctn(transformed, shape, block_size, workers=2), decoded
+        )
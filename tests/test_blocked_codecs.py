@@ -0,0 +1,178 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from pig.codecs import BlockedLightField, BlockedMico, BlockedMule, PredictiveLightField
+from pig.media import RawLightField
+from pig.metrics.image_metrics import psnr
+
+
+@pytest.mark.parametrize("codec_type", [BlockedMule, BlockedMico])
+def test_parallel_encoding_is_identical(codec_type):
+    data = np.random.randint(0, 256, (24, 20))
+
+    serial = codec_type()
+    serial_codestream = serial.encode(data, 100, block_size=8)
+
+    parallel = codec_type()
+    parallel_codestream = parallel.encode(data, 100, block_size=8, jobs=2)
+
+    assert parallel_codestream == serial_codestream
+    assert parallel.estimated_rd == serial.estimated_rd
+
+
+@pytest.mark.parametrize("codec_type", [BlockedMule, BlockedMico])
+def test_parallel_and_region_decoding(codec_type):
+    data = np.random.randint(0, 256, (24, 20))
+    codec = codec_type()
+    codestream = codec.encode(data, 100, block_size=8)
+    decoded = codec.decode(codestream)
+
+    assert np.array_equal(codec.decode(codestream, jobs=2), decoded)
+
+    for window in [
+        (slice(0, 24), slice(0, 20)),
+        (slice(3, 13), slice(9, 18)),
+        (slice(16, 24), slice(None)),
+        (slice(23, 24), slice(19, 20)),
+    ]:
+        assert np.array_equal(codec.decode_region(codestream, window), decoded[window])
+
+
+@pytest.mark.parametrize("codec_type", [BlockedMule, BlockedMico])
+def test_streaming(codec_type):
+    data = np.random.randint(0, 256, (27, 20))
+    codec = codec_type()
+    decoded = codec.decode(codec.encode(data, 100, block_size=8))
+    estimated_rd = codec.estimated_rd
+
+    fileobj = BytesIO(b"prefix")
+    fileobj.seek(0, 2)
+    codec.encode_to(fileobj, data, 100, block_size=8)
+    assert codec.estimated_rd == estimated_rd
+
+    fileobj.seek(len(b"prefix"))
+    output = np.zeros(data.shape, dtype=np.int32)
+    assert codec.decode_from(fileobj, output) is output
+    assert np.array_equal(output, decoded)
+
+
+@pytest.mark.parametrize(
+    "entropy, codec_type", [("mule", BlockedMule), ("mico", BlockedMico)]
+)
+def test_lightfield_coding(entropy, codec_type):
+    rng = np.random.default_rng(0)
+    scene = rng.integers(0, 1024, (12, 12))
+    views = np.stack(
+        [[scene[t : t + 8, s : s + 8] for s in range(3)] for t in range(3)]
+    )
+    lightfield = RawLightField(np.stack([views, 1023 - views], axis=-1), bitdepth=10)
+
+    codec = BlockedLightField()
+    codestream = codec.encode(lightfield, 1000, block_size=8, entropy=entropy)
+    decoded = codec.decode(codestream)
+
+    assert decoded.shape == lightfield.shape
+    assert decoded.bitdepth == 10
+    for channel in range(2):
+        channel_codec = codec_type()
+        channel_codestream = channel_codec.encode(
+            lightfield.get_channel(channel), 1000, block_size=8, bitdepth=10
+        )
+        expected = channel_codec.decode(channel_codestream)
+        assert np.array_equal(decoded.get_channel(channel), expected)
+
+    # Coding the views one by one ignores what they have in common
+    per_view_bits = sum(
+        len(
+            codec_type().encode(
+                lightfield[t, s, :, :, 0], 1000, block_size=8, bitdepth=10
+            )
+        )
+        for t in range(3)
+        for s in range(3)
+    )
+    assert len(codestream) / 2 < per_view_bits
+
+
+@pytest.mark.parametrize("codec_type", [BlockedMule, BlockedMico])
+def test_skipped_blocks(codec_type):
+    data = np.full((16, 24), 128)
+    data[:8, :8] = np.random.randint(0, 256, (8, 8))
+    data[8:, 8:16] += 1
+
+    codec = codec_type()
+    codestream = codec.encode(data, 100, block_size=8, skip=True)
+    assert len(codestream) < len(codec_type().encode(data, 100, block_size=8))
+    assert codec.estimated_rd.distortion >= 64
+
+    decoded = codec.decode(codestream)
+    assert np.all(decoded[8:, 8:16] == 128)
+
+    window = (slice(8, 16), slice(8, 24))
+    assert np.array_equal(codec.decode_region(codestream, window), decoded[window])
+
+    fileobj = BytesIO()
+    codec.encode_to(fileobj, data, 100, block_size=8, skip=True)
+    fileobj.seek(0)
+    assert np.array_equal(codec.decode_from(fileobj), decoded)
+
+
+@pytest.mark.parametrize(
+    "entropy, codec_type", [("mule", BlockedMule), ("mico", BlockedMico)]
+)
+def test_predictive_lightfield_coding(entropy, codec_type):
+    # Most residual blocks are flat, so they are skipped
+    rng = np.random.default_rng(0)
+    scene = np.full((36, 36), 512)
+    scene[10:18, 10:18] = rng.integers(0, 1024, (8, 8))
+    views = np.stack(
+        [[scene[t : t + 32, s : s + 32] for s in range(3)] for t in range(3)]
+    )
+    lightfield = RawLightField(views[..., None], bitdepth=10)
+
+    codec = PredictiveLightField()
+    codestream = codec.encode(
+        lightfield, 10, block_size=8, entropy=entropy, disparity=None
+    )
+    decoded = codec.decode(codestream)
+
+    assert decoded.shape == lightfield.shape
+    assert decoded.bitdepth == 10
+    assert psnr(lightfield, decoded, 10) > 40
+
+    per_view_bits = sum(
+        len(
+            codec_type().encode(
+                lightfield[t, s, :, :, 0], 10, block_size=8, bitdepth=10
+            )
+        )
+        for t in range(3)
+        for s in range(3)
+    )
+    assert len(codestream) < per_view_bits
+
+
+@pytest.mark.parametrize("disparity", [-129, 128, 200])
+def test_predictive_lightfield_invalid_disparity(disparity):
+    lightfield = RawLightField(np.zeros((3, 3, 8, 8, 1), dtype=int), bitdepth=8)
+    with pytest.raises(ValueError):
+        PredictiveLightField().encode(lightfield, 10, block_size=8, disparity=disparity)
+
+
+@pytest.mark.parametrize("codec_type", [BlockedMule, BlockedMico])
+def test_parallel_streaming(codec_type):
+    data = np.random.randint(0, 256, (40, 12))
+
+    serial = BytesIO()
+    codec_type().encode_to(serial, data, 100, block_size=8)
+
+    parallel = BytesIO()
+    codec_type().encode_to(parallel, data, 100, block_size=8, jobs=2)
+    assert parallel.getvalue() == serial.getvalue()
+
+    parallel.seek(0)
+    serial.seek(0)
+    decoded = codec_type().decode_from(parallel, jobs=2)
+    assert np.array_equal(decoded, codec_type().decode_from(serial))
@@ -6,6 +6,7 @@ from pig.entropy import (
     CabacEncoder,
     ExponentialSmoothingPM,
     FrequentistPM,
+    StateMachinePM,
 )
 
 
@@ -147,3 +148,103 @@ def test_small_sequence_iterativelly():
     decoded = decoder.end()
 
     assert bitarray("1" * 5) == decoded
+
+
+def test_state_machine_model():
+    original = bitarray((np.random.random(2000) < 0.1).tolist())
+
+    encoded_table = CabacEncoder().encode(original, model=StateMachinePM())
+    encoded_float = CabacEncoder().encode(original, model=FrequentistPM())
+    decoded = CabacDecoder().decode(
+        encoded_table, len(original), model=StateMachinePM()
+    )
+
+    assert original == decoded
+    # Both engines should get close to the entropy of the source
+    assert len(encoded_table) < 0.6 * len(original)
+    assert len(encoded_table) < 1.2 * len(encoded_float)
+
+
+def test_state_machine_low_precision():
+    original = bitarray((np.random.random(2000) < 0.1).tolist())
+
+    for precision in [6, 8, 9, 10]:
+        encoder = CabacEncoder()
+        decoder = CabacDecoder()
+        encoder.configure_precision(precision)
+        decoder.configure_precision(precision)
+
+        encoded = encoder.encode(original, model=StateMachinePM())
+        decoded = decoder.decode(encoded, len(original), model=StateMachinePM())
+        assert original == decoded
+
+
+def test_state_machine_mixed_models():
+    parts = [
+        (np.random.random(300) < 0.05).tolist(),
+        (np.random.random(200) < 0.5).tolist(),
+        (np.random.random(300) < 0.97).tolist(),
+    ]
+
+    encoder_models = [StateMachinePM() for _ in parts]
+    decoder_models = [StateMachinePM() for _ in parts]
+
+    encoder = CabacEncoder().start()
+    for bits, model in zip(parts, encoder_models):
+        for bit in bits:
+            encoder.encode_bit(bit, model=model)
+    encoded_bitstream = encoder.end(fill_to_byte=True)
+
+    decoder = CabacDecoder().start(encoded_bitstream)
+    for bits, model in zip(parts, decoder_models):
+        for _ in bits:
+            decoder.decode_bit(model=model)
+    decoded_bitstream = decoder.end()
+
+    assert bitarray(sum(parts, [])) == decoded_bitstream
+    for e, d in zip(encoder_models, decoder_models):
+        assert e == d
+
+
+def test_forward_bit_order():
+    original = bitarray((np.random.random(500) < 0.3).tolist())
+
+    encoded_forward = CabacEncoder(forward=True).encode(original)
+    encoded_reversed = CabacEncoder().encode(original)
+
+    assert encoded_forward == encoded_reversed[::-1]
+    assert original == CabacDecoder(forward=True).decode(encoded_forward, len(original))
+
+
+def test_decoding_from_bytes():
+    original = bitarray((np.random.random(500) < 0.7).tolist())
+
+    encoded = CabacEncoder(forward=True).encode(original, fill_to_byte=True)
+    encoded_bytes = encoded.tobytes()
+    decoded = CabacDecoder(forward=True).decode(
+        memoryview(encoded_bytes), len(original)
+    )
+    assert original == decoded
+
+    # The legacy backwards order is also read without copying the input
+    encoded = CabacEncoder().encode(original, fill_to_byte=True)
+    decoded = CabacDecoder().decode(encoded.tobytes(), len(original))
+    assert original == decoded
+
+
+def test_bypass_bins():
+    model_e = FrequentistPM()
+    encoder = CabacEncoder().start()
+    encoder.encode_bit(1, model=model_e)
+    encoder.encode_bypass(0b1011001110, 10)
+    encoder.encode_bit(1, model=model_e)
+    encoder.encode_bypass(1, 1)
+    encoded = encoder.end(fill_to_byte=True)
+
+    model_d = FrequentistPM()
+    decoder = CabacDecoder().start(encoded)
+    assert decoder.decode_bit(model=model_d) == 1
+    assert decoder.decode_bypass(10) == 0b1011001110
+    assert decoder.decode_bit(model=model_d) == 1
+    assert decoder.decode_bypass(1) == 1
+    assert model_e == model_d
@@ -0,0 +1,18 @@
+import numpy as np
+
+from pig.utils.integral_image import IntegralImage
+
+
+def test_region_sums():
+    for shape in [(7, 9), (5, 6, 3, 4), (4,)]:
+        values = np.random.randint(-100, 100, shape)
+        integral = IntegralImage(values)
+
+        for _ in range(100):
+            position = []
+            for size in shape:
+                start, stop = sorted(np.random.randint(0, size + 1, 2).tolist())
+                position.append(slice(start, stop))
+            position = tuple(position)
+
+            assert integral.sum(position) == np.sum(values[position])
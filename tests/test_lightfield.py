@@ -0,0 +1,144 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from pig.codecs import BlockedMico
+from pig.media import LazyLightField, RawLightField
+from pig.utils.lightfield_archive import (
+    HEADER_STRUCT,
+    PAGE_SIZE,
+    LightFieldArchiveHandler,
+)
+from pig.utils.pgx_handler import PGXHandler
+
+
+@pytest.fixture
+def lightfield_path(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.integers(0, 1024, (2, 3, 4, 5, 3)).astype(">u2")
+
+    handler = PGXHandler()
+    for c in range(3):
+        (tmp_path / str(c)).mkdir()
+        for t in range(2):
+            for s in range(3):
+                handler.write(tmp_path / f"{c}/{t:03}_{s:03}.pgx", data[t, s, :, :, c])
+
+    return tmp_path, data
+
+
+def test_from_file_layouts(lightfield_path):
+    path, data = lightfield_path
+
+    lightfield = RawLightField.from_file(path, workers=4)
+    assert lightfield.dtype == np.uint16
+    assert lightfield.bitdepth == 10
+    assert lightfield.throughput > 0
+    assert np.array_equal(lightfield, data)
+    assert lightfield[:1].throughput is None
+    assert RawLightField(data, bitdepth=10).throughput is None
+
+    view_major = RawLightField.from_file(path, layout="view_major")
+    assert view_major.shape == (2, 3, 3, 4, 5)
+    assert np.array_equal(view_major, data.transpose(0, 1, 4, 2, 3))
+    assert view_major[1, 2, 0].flags.c_contiguous
+
+    for lf in (lightfield, view_major):
+        assert (lf.t(), lf.s(), lf.v(), lf.u(), lf.channels()) == (2, 3, 4, 5, 3)
+        assert lf.get_sample(1, 2, 3, 4, 1) == data[1, 2, 3, 4, 1]
+        assert np.array_equal(lf.get_pixel(0, 1, 2, 3), data[0, 1, 2, 3])
+        assert np.array_equal(lf.get_channel(2), data[..., 2])
+        assert np.array_equal(lf.get_view(1, 2), data[1, 2])
+
+
+def test_lazy_lightfield(lightfield_path):
+    path, data = lightfield_path
+    view_bytes = data[0, 0].size * 2
+
+    lightfield = LazyLightField.from_directory(path, cache_bytes=2 * view_bytes)
+    assert lightfield.shape == data.shape
+    assert lightfield.bitdepth == 10
+
+    assert np.array_equal(lightfield.get_view(1, 2), data[1, 2])
+    assert np.array_equal(lightfield[1], data[1])
+    assert np.array_equal(lightfield[:, 1:, 2, ::2], data[:, 1:, 2, ::2])
+    assert np.array_equal(lightfield.get_channel(1), data[..., 1])
+    assert lightfield.get_sample(0, 1, 2, 3, 2) == data[0, 1, 2, 3, 2]
+    assert lightfield._cached_bytes <= 2 * view_bytes
+
+    assert np.array_equal(lightfield.get_view(-1, -1), data[-1, -1])
+    assert lightfield.get_view(-1, -1) is lightfield.get_view(1, 2)
+    with pytest.raises(IndexError):
+        lightfield.get_view(2, 0)
+    with pytest.raises(IndexError):
+        lightfield.get_view(0, -4)
+
+    packed = np.ascontiguousarray(data.transpose(0, 1, 4, 2, 3))
+    from_array = LazyLightField.from_array(packed, 10, layout="view_major")
+    assert np.array_equal(np.asarray(from_array), data)
+
+
+def test_lazy_lightfield_streaming(lightfield_path):
+    path, data = lightfield_path
+    lightfield = LazyLightField.from_directory(path)
+
+    expected = BytesIO()
+    BlockedMico().encode_to(expected, data, 100, block_size=2, bitdepth=10)
+
+    streamed = BytesIO()
+    BlockedMico().encode_to(streamed, lightfield, 100, block_size=2, bitdepth=10)
+    assert streamed.getvalue() == expected.getvalue()
+
+
+def test_archive(lightfield_path, tmp_path_factory):
+    path, data = lightfield_path
+    archive_path = tmp_path_factory.mktemp("archive") / "lightfield.plf"
+
+    handler = LightFieldArchiveHandler()
+    handler.from_pgx_directory(path, archive_path)
+
+    header = handler.read_header(archive_path)
+    assert (header.t, header.s, header.v, header.u, header.channels) == (2, 3, 4, 5, 3)
+    assert header.bitdepth == 10
+    assert all(offset % PAGE_SIZE == 0 for offset in header.view_offsets)
+
+    view_major = data.transpose(0, 1, 4, 2, 3)
+    assert np.array_equal(handler.open(archive_path), view_major)
+    assert np.array_equal(handler.read(archive_path), view_major)
+    assert np.array_equal(RawLightField.from_file(archive_path), data)
+    assert np.array_equal(
+        LazyLightField.from_archive(archive_path)[1, :, 2], data[1, :, 2]
+    )
+    assert np.array_equal(
+        LazyLightField.from_archive(archive_path).get_view(1, 2),
+        RawLightField.from_file(archive_path, layout="view_major").get_view(1, 2),
+    )
+
+    handler.write(archive_path, data, 10)
+    assert np.array_equal(handler.open(archive_path), view_major)
+
+    directory = tmp_path_factory.mktemp("unpacked")
+    handler.to_pgx_directory(archive_path, directory)
+    assert np.array_equal(RawLightField.from_file(directory), data)
+
+
+def test_archive_open_needs_uniform_offsets(lightfield_path, tmp_path_factory):
+    _, data = lightfield_path
+    archive_path = tmp_path_factory.mktemp("archive") / "lightfield.plf"
+
+    handler = LightFieldArchiveHandler()
+    handler.write(archive_path, data, 10)
+
+    # Swap the offsets of the first two views, which read() follows but open() cannot
+    header = handler.read_header(archive_path)
+    offsets = list(header.view_offsets)
+    offsets[0], offsets[1] = offsets[1], offsets[0]
+    with open(archive_path, "r+b") as file:
+        file.seek(HEADER_STRUCT.size)
+        file.write(np.array(offsets, dtype=">u8").tobytes())
+
+    read = handler.read(archive_path)
+    assert np.array_equal(read[0, 0], data[0, 1].transpose(2, 0, 1))
+    with pytest.raises(ValueError):
+        handler.open(archive_path)
@@ -3,6 +3,9 @@ import pytest
 
 from pig.entropy import MicoDecoder, MicoEncoder
 from pig.entropy.mico.mico_optimizer import MicoOptimizer
+from pig.entropy.mico.partition_tree import get_partition_tree
+from pig.entropy.mico.utils import get_level
+from pig.utils.block_utils import split_shape_in_half
 
 
 def test_mico_bitplanes():
@@ -16,6 +19,33 @@ def test_mico_bitplanes():
     )  # fmt: skip
     assert list(MicoOptimizer.find_bitplane_per_level(original)) == [5, 4, 2, 2]
 
+    stack = np.stack([original, original // 4, np.zeros_like(original)])
+    stacked_bitplanes = MicoOptimizer.find_bitplane_per_level(stack, stacked=True)
+    for block, bitplanes in zip(stack, stacked_bitplanes):
+        assert list(bitplanes) == list(MicoOptimizer.find_bitplane_per_level(block))
+
+
+def test_partition_tree():
+    shape = (5, 1, 3)
+    tree = get_partition_tree(shape)
+    assert get_partition_tree(shape) is tree
+
+    flat_indices = np.arange(np.prod(shape)).reshape(shape)
+    for node, position in enumerate(tree.positions):
+        assert tree.node_levels[node] == get_level(position)
+        assert list(tree.offsets[node]) == list(flat_indices[position].flatten())
+
+        expected_children = [
+            sub_position
+            for sub_position in split_shape_in_half(position)
+            if flat_indices[sub_position].size > 0
+        ]
+        if tree.sizes[node] == 1:
+            expected_children = []
+        assert [
+            tree.positions[child] for child in tree.children[node]
+        ] == expected_children
+
 
 def test_mico_easy():
     original = np.array(
@@ -80,3 +110,21 @@ def test_mico_random():
             assert d > e
         else:
             assert d == e
+
+
+def test_mico_bypass():
+    original = np.random.randint(-255, 255, (16, 16))
+
+    encoder = MicoEncoder(bypass_signs=True, bypass_bitplanes=3)
+    decoder = MicoDecoder(bypass_signs=True, bypass_bitplanes=3)
+
+    encoded = encoder.encode(
+        original,
+        lagrangian=0,
+    )
+    decoded = decoder.decode(
+        encoded,
+        original.shape,
+    )
+
+    assert np.allclose(original, decoded)
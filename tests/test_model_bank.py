@@ -0,0 +1,87 @@
+import numpy as np
+
+from pig.entropy import FrequentistPM
+from pig.entropy.probability_model.model_bank import ModelBank
+
+
+def test_same_estimates_as_frequentist():
+    bank = ModelBank(4)
+    banked = bank.model(2)
+    model = FrequentistPM()
+
+    for bit in (np.random.random(200) < 0.3).tolist():
+        assert banked.estimate_bit(bit) == model.estimate_bit(bit)
+        assert banked.split_range(65535) == model.split_range(65535)
+        assert banked.add_and_estimate_bit(bit) == model.add_and_estimate_bit(bit)
+
+    assert banked == model
+    assert bank.model(0).get_values() == (1, 1)
+
+
+def test_push_and_pop():
+    bank = ModelBank(3)
+    bank.model(0).add_bit(1)
+
+    bank.push()
+    bank.model(0).add_bit(1)
+    bank.model(1).add_bit(0)
+
+    bank.push()
+    bank.model(2).add_bit(0)
+    bank.pop()
+
+    assert [model.get_values() for model in bank.models] == [(1, 3), (2, 1), (1, 1)]
+
+    bank.pop()
+    assert [model.get_values() for model in bank.models] == [(1, 2), (1, 1), (1, 1)]
+
+
+def test_journal_matches_snapshots():
+    # Checkpoints that are never popped, like the optimizers do when they
+    # keep a speculative estimation, must behave like snapshots
+    bank = ModelBank(5)
+    reference = [FrequentistPM() for _ in range(5)]
+    generator = np.random.default_rng(0)
+
+    for _ in range(300):
+        action = generator.integers(0, 3)
+
+        if action == 0:
+            bank.push()
+            for model in reference:
+                model.push()
+
+        elif action == 1 and bank.checkpoints:
+            bank.pop()
+            for model in reference:
+                model.pop()
+
+        else:
+            context = generator.integers(0, 5)
+            bit = bool(generator.integers(0, 2))
+            bank.model(context).add_bit(bit)
+            reference[context].add_bit(bit)
+
+        assert [m.get_values() for m in bank.models] == [
+            m.get_values() for m in reference
+        ]
+
+    while bank.checkpoints:
+        bank.pop()
+    assert len(bank.journal) == 0
+
+
+def test_estimate_counts():
+    bank = ModelBank(2)
+    banked = bank.model(1)
+    model = FrequentistPM(3, 5)
+    banked.set_values((3, 5))
+
+    expected = sum(model.add_and_estimate_bit(0) for _ in range(7))
+    expected += sum(model.add_and_estimate_bit(1) for _ in range(4))
+
+    bank.push()
+    assert np.isclose(banked.add_and_estimate_counts(7, 4), expected)
+    assert banked == model
+    bank.pop()
+    assert banked.get_values() == (3, 5)
@@ -53,3 +53,38 @@ def test_mule_random():
     )
 
     assert np.allclose(original, decoded)
+
+
+def test_mule_bypass():
+    original = np.random.randint(-255, 255, (16, 16))
+
+    encoder = MuleEncoder(bypass_signs=True, bypass_bitplanes=3)
+    decoder = MuleDecoder(bypass_signs=True, bypass_bitplanes=3)
+
+    encoded = encoder.encode(
+        original,
+        0,
+    )
+    decoded = decoder.decode(
+        encoded,
+        original.shape,
+        upper_bitplane=encoder.upper_bitplane,
+    )
+
+    assert np.allclose(original, decoded)
+
+
+def test_mule_reused_encoder():
+    first = np.random.randint(-255, 255, (16, 16))
+    second = np.random.randint(-64, 64, (16, 16))
+
+    reused = MuleEncoder()
+    reused.encode(first, 100)
+    encoded = reused.encode(second, 100)
+
+    fresh = MuleEncoder()
+    expected = fresh.encode(second, 100)
+
+    assert reused.flags == fresh.flags
+    assert reused.estimated_rd.rate == fresh.estimated_rd.rate
+    assert encoded == expected
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from pig.media import RawImage
+from pig.utils.pgx_handler import PGXHandler
+
+
+@pytest.mark.parametrize(
+    "header, dtype",
+    [
+        (b"PG ML +10 5 3 \n", ">u2"),
+        (b"PG LM -12 5 3\n", "<i2"),
+        (b"PG ML +8 5 3 \n", ">u1"),
+        (b"PG LM +17 5 3 \n", "<u4"),
+    ],
+)
+def test_open_memory_mapped(tmp_path, header, dtype):
+    data = np.arange(15, dtype=dtype).reshape(3, 5)
+    if dtype[1] == "i":
+        data -= 7
+
+    path = tmp_path / "image.pgx"
+    path.write_bytes(header + data.tobytes())
+
+    handler = PGXHandler()
+    mapped = handler.open(path)
+    assert isinstance(mapped, np.memmap)
+    assert mapped.dtype == np.dtype(dtype)
+    assert np.array_equal(mapped, data)
+    assert np.array_equal(handler.open(path, mmap=False), data)
+
+    image = RawImage.from_file(path)
+    assert image.bitdepth == int(header.split()[2][1:])
+    assert np.array_equal(image, data)
+
+
+@pytest.mark.parametrize(
+    "data, depth",
+    [
+        (np.array([[2000]]), 8),
+        (np.array([[256]], dtype=np.uint16), 8),
+        (np.array([[-129]]), 8),
+        (np.array([[-1, 128]]), 8),
+    ],
+)
+def test_write_out_of_range(tmp_path, data, depth):
+    with pytest.raises(ValueError):
+        PGXHandler().write(tmp_path / "image.pgx", data, depth=depth)
+
+
+def test_write_signed(tmp_path):
+    data = np.array([[-128, 127]])
+    path = tmp_path / "image.pgx"
+    PGXHandler().write(path, data, depth=8)
+    assert np.array_equal(PGXHandler().read(path), data)
@@ -0,0 +1,99 @@
+import numpy as np
+from bitarray import bitarray
+
+from pig.entropy import (
+    CabacEncoder,
+    FrequentistPM,
+    MicoDecoder,
+    MicoEncoder,
+    MuleDecoder,
+    MuleEncoder,
+    RangeDecoder,
+    RangeEncoder,
+    StateMachinePM,
+)
+
+
+def test_more_zeros_than_ones():
+    original = bitarray((np.random.random(1000) < 0.1).tolist())
+
+    encoded = RangeEncoder().encode(original)
+    decoded = RangeDecoder().decode(encoded, len(original))
+
+    assert len(encoded) % 8 == 0
+    assert len(encoded) < len(original)
+    assert original == decoded
+
+
+def test_same_rate_as_cabac():
+    original = bitarray((np.random.random(5000) < 0.8).tolist())
+
+    encoded_range = RangeEncoder().encode(original)
+    encoded_cabac = CabacEncoder().encode(original, fill_to_byte=True)
+
+    assert abs(len(encoded_range) - len(encoded_cabac)) <= 32
+
+
+def test_short_sequences():
+    for size in range(20):
+        original = bitarray((np.random.random(size) < 0.5).tolist())
+        encoded = RangeEncoder().encode(original, model=StateMachinePM())
+        decoded = RangeDecoder().decode(encoded, size, model=StateMachinePM())
+        assert original == decoded
+
+
+def test_mixed_models():
+    parts = [
+        (np.random.random(300) < 0.05).tolist(),
+        (np.random.random(200) < 0.5).tolist(),
+        (np.random.random(300) < 0.97).tolist(),
+    ]
+
+    encoder_models = [FrequentistPM() for _ in parts]
+    decoder_models = [FrequentistPM() for _ in parts]
+
+    encoder = RangeEncoder().start()
+    for bits, model in zip(parts, encoder_models):
+        for bit in bits:
+            encoder.encode_bit(bit, model=model)
+    encoded_bitstream = encoder.end()
+
+    decoder = RangeDecoder().start(encoded_bitstream.tobytes())
+    for bits, model in zip(parts, decoder_models):
+        for _ in bits:
+            decoder.decode_bit(model=model)
+    decoded_bitstream = decoder.end()
+
+    assert bitarray(sum(parts, [])) == decoded_bitstream
+    for e, d in zip(encoder_models, decoder_models):
+        assert e == d
+
+
+def test_mule_with_range_coder():
+    original = np.random.randint(-300, 300, (16, 16))
+
+    encoder = MuleEncoder()
+    encoder.cabac = RangeEncoder()
+    decoder = MuleDecoder()
+    decoder.cabac = RangeDecoder()
+
+    encoded = encoder.encode(original, 0)
+    decoded = decoder.decode(
+        encoded, original.shape, upper_bitplane=encoder.upper_bitplane
+    )
+
+    assert np.allclose(original, decoded)
+
+
+def test_mico_with_range_coder():
+    original = np.random.randint(-300, 300, (8, 8, 4))
+
+    encoder = MicoEncoder()
+    encoder.cabac = RangeEncoder()
+    decoder = MicoDecoder()
+    decoder.cabac = RangeDecoder()
+
+    encoded = encoder.encode(original, 0)
+    decoded = decoder.decode(encoded, original.shape)
+
+    assert np.allclose(original, decoded)
@@ -0,0 +1,108 @@
+import numpy as np
+from bitarray import bitarray
+
+from pig.entropy import (
+    CabacEncoder,
+    FrequentistPM,
+    MicoDecoder,
+    MicoEncoder,
+    MuleDecoder,
+    MuleEncoder,
+    RansDecoder,
+    RansEncoder,
+)
+from pig.entropy.rans.rans_encoder import LOWER_BOUND
+
+
+def test_interleaved_streams():
+    original = bitarray((np.random.random(1000) < 0.2).tolist())
+
+    for streams in range(1, 6):
+        encoded = RansEncoder(streams).encode(original)
+        decoder = RansDecoder(streams)
+        decoded = decoder.decode(encoded, len(original))
+
+        assert original == decoded
+        # Every state goes back to where the encoder started
+        assert decoder.states == [LOWER_BOUND] * streams
+
+
+def test_close_to_cabac_rate():
+    original = bitarray((np.random.random(5000) < 0.9).tolist())
+
+    encoded_rans = RansEncoder(4).encode(original)
+    encoded_cabac = CabacEncoder().encode(original)
+
+    assert len(encoded_rans) < len(encoded_cabac) + 4 * 32
+
+
+def test_mixed_models():
+    parts = [
+        (np.random.random(300) < 0.05).tolist(),
+        (np.random.random(200) < 0.5).tolist(),
+        (np.random.random(300) < 0.97).tolist(),
+    ]
+
+    encoder_models = [FrequentistPM() for _ in parts]
+    decoder_models = [FrequentistPM() for _ in parts]
+
+    encoder = RansEncoder(3).start()
+    for bits, model in zip(parts, encoder_models):
+        for bit in bits:
+            encoder.encode_bit(bit, model=model)
+    encoded_bitstream = encoder.end()
+
+    decoder = RansDecoder(3).start(encoded_bitstream.tobytes())
+    for bits, model in zip(parts, decoder_models):
+        for _ in bits:
+            decoder.decode_bit(model=model)
+    decoded_bitstream = decoder.end()
+
+    assert bitarray(sum(parts, [])) == decoded_bitstream
+    for e, d in zip(encoder_models, decoder_models):
+        assert e == d
+
+
+def test_bypass_bins():
+    model_e = FrequentistPM()
+    encoder = RansEncoder().start()
+    encoder.encode_bit(0, model=model_e)
+    encoder.encode_bypass(0b1011001110, 10)
+    encoder.encode_bit(1, model=model_e)
+    encoded = encoder.end()
+
+    model_d = FrequentistPM()
+    decoder = RansDecoder().start(encoded)
+    assert decoder.decode_bit(model=model_d) == 0
+    assert decoder.decode_bypass(10) == 0b1011001110
+    assert decoder.decode_bit(model=model_d) == 1
+
+
+def test_mule_with_rans():
+    original = np.random.randint(-300, 300, (16, 16))
+
+    encoder = MuleEncoder(bypass_signs=True)
+    encoder.cabac = RansEncoder(4)
+    decoder = MuleDecoder(bypass_signs=True)
+    decoder.cabac = RansDecoder(4)
+
+    encoded = encoder.encode(original, 0)
+    decoded = decoder.decode(
+        encoded, original.shape, upper_bitplane=encoder.upper_bitplane
+    )
+
+    assert np.allclose(original, decoded)
+
+
+def test_mico_with_rans():
+    original = np.random.randint(-300, 300, (8, 8, 4))
+
+    encoder = MicoEncoder()
+    encoder.cabac = RansEncoder(4)
+    decoder = MicoDecoder()
+    decoder.cabac = RansDecoder(4)
+
+    encoded = encoder.encode(original, 0)
+    decoded = decoder.decode(encoded, original.shape)
+
+    assert np.allclose(original, decoded)